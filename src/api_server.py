@@ -4,20 +4,35 @@ Uses modular architecture: Scout finds links, Explorer extracts events
 """
 
 import os
+import re
 import sys
+import queue
+import logging
+import logging.handlers
+import importlib.util
+import time
+import uuid
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-import json
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple, Type, TypeVar
 import asyncio
+import gzip
+import hashlib
+from contextlib import asynccontextmanager
+from functools import lru_cache
 
+import aiofiles
+import orjson
 from dotenv import load_dotenv
 load_dotenv()
 
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, ValidationError
 import uvicorn
 
 # Import modules
@@ -25,14 +40,20 @@ from scout import scout_events
 from explorer import explore_links
 from edit_itinerary import process_edit_request
 from user_interests import INTEREST_CATEGORIES, get_all_tags, find_categories_for_interests
+from workflow import build_graph
 
 # Configuration
 CONFIG = {
     "google_api_key": os.getenv("GOOGLE_API_KEY"),
     "gemini_model": os.getenv("GEMINI_MODEL", "gemini-2.0-flash"),
     "port": int(os.getenv("API_PORT", "5500")),
+    "workers": int(os.getenv("WORKERS", os.cpu_count() or 1)),
+    "max_connections": int(os.getenv("MAX_CONNECTIONS", "1000")),
 }
 
+# uvloop ships with uvicorn[standard] except on Windows, where it isn't available
+HAS_UVLOOP = importlib.util.find_spec("uvloop") is not None
+
 # Validate configuration
 if not CONFIG["google_api_key"]:
     print("❌ GOOGLE_API_KEY is required")
@@ -42,11 +63,69 @@ if not CONFIG["google_api_key"]:
 LOGS_DIR = Path(__file__).parent.parent / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Edit endpoint logging: handlers only enqueue records, a listener thread writes them
+edit_log = logging.getLogger("navis.edit")
+edit_log.setLevel(logging.INFO)
+edit_log.propagate = False
+_edit_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+edit_log.addHandler(logging.handlers.QueueHandler(_edit_log_queue))
+_edit_log_handler = logging.StreamHandler(sys.stderr)
+_edit_log_handler.setFormatter(logging.Formatter("%(message)s"))
+edit_log_listener = logging.handlers.QueueListener(_edit_log_queue, _edit_log_handler)
+
+# Internal event fields left out of the saved itinerary
+_HIDDEN_KEYS = frozenset({"interest_matched", "target_date"})
+
+# Console log lines are batched and flushed at most this often (seconds)
+LOG_FLUSH_INTERVAL = 0.05
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Wall-clock timestamp for response fields, refreshed once per second
+_NOW_ISO = datetime.now().isoformat(timespec="seconds")
+
+
+async def _tick_clock():
+    global _NOW_ISO
+    while True:
+        _NOW_ISO = datetime.now().isoformat(timespec="seconds")
+        await asyncio.sleep(1.0)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the graph once per worker, shared by all requests
+    app.state.graph = build_graph()
+    app.state.background_tasks = set()
+    edit_log_listener.start()
+    clock = asyncio.create_task(_tick_clock())
+    yield
+    clock.cancel()
+    # Let pending log writes finish before the worker exits
+    await asyncio.gather(*app.state.background_tasks, return_exceptions=True)
+    edit_log_listener.stop()
+
+
+def run_in_background(coro) -> asyncio.Task:
+    """Schedule post-response work, holding a reference until it finishes."""
+    task = asyncio.create_task(coro)
+    app.state.background_tasks.add(task)
+    task.add_done_callback(app.state.background_tasks.discard)
+    return task
+
+
 # FastAPI app
 app = FastAPI(
     title="Navis Itinerary API",
     description="AI-powered itinerary generation using Google Gemini",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -58,9 +137,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class JSONGZipMiddleware(GZipMiddleware):
+    """GZip that never touches SSE routes (proxies buffer compressed streams)."""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress large itinerary JSON; level 5 trades little ratio for much less CPU.
+# /api/interests negotiates its own pre-compressed variant.
+UNCOMPRESSED_PATHS = frozenset({"/api/generate-itinerary-stream", "/api/interests"})
+app.add_middleware(JSONGZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Interest categories are static; serialize the response once at startup
+INTERESTS_JSON = orjson.dumps({
+    "success": True,
+    "categories": INTEREST_CATEGORIES,
+    "all_tags": get_all_tags()
+})
+INTERESTS_ETAG = f'"{hashlib.md5(INTERESTS_JSON).hexdigest()}"'
+# Pre-compressed too, so the gzip middleware never recompresses it per request.
+# Each encoding is a distinct representation and needs its own validator.
+INTERESTS_JSON_GZIP = gzip.compress(INTERESTS_JSON, compresslevel=9, mtime=0)
+INTERESTS_GZIP_ETAG = INTERESTS_ETAG[:-1] + '-gz"'
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (honours q=0 and *)."""
+    qvalues = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+    return qvalues.get("gzip", qvalues.get("x-gzip", qvalues.get("*", 0.0))) > 0
+
 
 # Request/Response models
 class GenerateItineraryRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+    
     city: str
     interests: str
     start_date: str
@@ -68,6 +196,8 @@ class GenerateItineraryRequest(BaseModel):
 
 
 class EditItineraryRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+    
     edit_request: str
     current_activity: Dict[str, Any]
     city: Optional[str] = None
@@ -75,87 +205,260 @@ class EditItineraryRequest(BaseModel):
     interests: Optional[List[str]] = None
 
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+async def parse_body(http_request: Request, model: Type[ModelT]) -> ModelT:
+    """Validate the raw JSON body in one pass with pydantic-core.
+    
+    FastAPI's own body handling decodes with the stdlib json module and then
+    validates the resulting dicts; this skips the intermediate Python objects.
+    Errors keep FastAPI's 422 shape.
+    """
+    try:
+        return model.model_validate_json(await http_request.body())
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])}
+            for error in e.errors(include_url=False)
+        ])
+
+
+def json_body(model: Type[BaseModel]) -> Dict[str, Any]:
+    """OpenAPI request body for endpoints that read their body via parse_body."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}}
+        }
+    }
+
+
+# uuid7 (Python 3.14+) is time-ordered; uuid4 is the fallback
+_uuid = getattr(uuid, "uuid7", uuid.uuid4)
+
+
+def new_request_id() -> str:
+    """Collision-free request ID, unique even within the same millisecond."""
+    return _uuid().hex
+
+
+def encode_log_json(data: Any) -> bytes:
+    """Compact JSON, gzipped at level 1: several times smaller for little CPU."""
+    return gzip.compress(orjson.dumps(data), compresslevel=1)
+
+
 # Logger class
 class Logger:
     def __init__(self, request_id: str):
         self.request_id = request_id
-        self.timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
         
         # Create subfolder for this request
         self.folder_name = f"request_{self.timestamp}_{request_id}"
         self.request_dir = LOGS_DIR / self.folder_name
-        self.request_dir.mkdir(exist_ok=True)
+        self._mkdir: Optional[asyncio.Task] = None
         
         # File paths
         self.log_file = self.request_dir / "console.log"
-        self.scout_file = self.request_dir / "scout.json"
-        self.explorer_file = self.request_dir / "explorer.json"
-        self.itinerary_file = self.request_dir / "itinerary.json"
+        self.scout_file = self.request_dir / "scout.json.gz"
+        self.explorer_file = self.request_dir / "explorer.json.gz"
+        self.itinerary_file = self.request_dir / "itinerary.json.gz"
         
         self.platforms_used: set = set()
         self.data: Dict[str, Any] = {}
+        
+        # Console lines are queued and written in batches by one background
+        # task, started by the first log() so a logger that never logs (e.g.
+        # the client left immediately) leaves no task, file or folder behind
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._closed = False  # set once the None sentinel is queued
+        self._flusher: Optional[asyncio.Task] = None
+        
+        # Lines carry an offset from the request start rather than a wall-clock
+        # stamp, so the clock is only read and formatted once per request
+        self._t0 = time.monotonic()
+        self._started = datetime.now().isoformat()
     
     def log(self, message: str):
-        log_entry = f"[{datetime.now().isoformat()}] {message}\n"
         print(message)
-        with open(self.log_file, "a") as f:
-            f.write(log_entry)
+        if self._closed:
+            return
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+            self._queue.put_nowait(f"[{self._started}] Request {self.request_id} started\n")
+        self._queue.put_nowait(f"[+{time.monotonic() - self._t0:.3f}s] {message}\n")
+    
+    def _ensure_dir(self) -> asyncio.Task:
+        """Create the request folder once, off the event loop; await before writing."""
+        if self._mkdir is None:
+            self._mkdir = asyncio.create_task(asyncio.to_thread(self.request_dir.mkdir, exist_ok=True))
+        return self._mkdir
+    
+    async def _flush_loop(self):
+        await self._ensure_dir()
+        async with aiofiles.open(self.log_file, "a") as f:
+            closing = False
+            while not closing:
+                batch = [await self._queue.get()]
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                if None in batch:
+                    closing = True
+                    del batch[batch.index(None):]
+                if batch:
+                    await f.write("".join(batch))
+                    await f.flush()
+                if not closing:
+                    await asyncio.sleep(LOG_FLUSH_INTERVAL)
+    
+    async def _write_json(self, path: Path, data: Any):
+        """Serialize and compress off the event loop, then write asynchronously."""
+        payload = await asyncio.to_thread(encode_log_json, data)
+        await self._ensure_dir()
+        async with aiofiles.open(path, "wb") as f:
+            await f.write(payload)
     
-    def log_scout_results(self, results: Dict[str, Any]):
+    async def log_scout_results(self, results: Dict[str, Any]):
         self.log(f"\n📊 Scout Results: {results.get('total_links_found', 0)} unique links found")
-        with open(self.scout_file, "w") as f:
-            json.dump(results, f, indent=2)
-        self.log(f"📁 Scout results saved to: {self.folder_name}/scout.json")
+        await self._write_json(self.scout_file, results)
+        self.log(f"📁 Scout results saved to: {self.folder_name}/{self.scout_file.name}")
     
-    def log_explorer_results(self, results: Dict[str, Any]):
+    async def log_explorer_results(self, results: Dict[str, Any]):
         self.log(f"\n📊 Explorer Results: {results.get('total_events', 0)} valid events extracted")
         
-        for event in results.get("events", []):
-            platform = event.get("source", {}).get("platform")
-            if platform:
-                self.platforms_used.add(platform)
+        self.platforms_used.update(
+            platform for platform in (
+                event.get("source", {}).get("platform") for event in results.get("events", [])
+            ) if platform
+        )
         
-        with open(self.explorer_file, "w") as f:
-            json.dump(results, f, indent=2)
-        self.log(f"📁 Explorer results saved to: {self.folder_name}/explorer.json")
+        await self._write_json(self.explorer_file, results)
+        self.log(f"📁 Explorer results saved to: {self.folder_name}/{self.explorer_file.name}")
     
-    def log_final_itinerary(self, events: List[Dict[str, Any]]):
+    async def log_final_itinerary(self, events: List[Dict[str, Any]]):
         self.log(f"\n✅ Final itinerary generated with {len(events)} events")
         
-        # Clean events
-        cleaned_events = []
-        for event in events:
-            clean_event = {k: v for k, v in event.items() if k not in ["interest_matched", "target_date"]}
-            cleaned_events.append(clean_event)
-        
         itinerary_output = {
-            "itinerary": cleaned_events,
+            # Single filtered copy per event rather than copy-then-pop
+            "itinerary": [
+                {k: v for k, v in event.items() if k not in _HIDDEN_KEYS}
+                for event in events
+            ],
             "search_summary": {
                 "platforms_used": list(self.platforms_used),
-                "search_date": datetime.now().isoformat()
+                "search_date": _NOW_ISO
             }
         }
         
-        with open(self.itinerary_file, "w") as f:
-            json.dump(itinerary_output, f, indent=2)
-        self.log(f"📁 Itinerary saved to: {self.folder_name}/itinerary.json")
+        await self._write_json(self.itinerary_file, itinerary_output)
+        self.log(f"📁 Itinerary saved to: {self.folder_name}/{self.itinerary_file.name}")
     
-    def save_all(self):
+    async def finalize(self, events: Optional[List[Dict[str, Any]]] = None):
+        """Write the final itinerary (if any) and flush all logs."""
+        if events is not None:
+            await self.log_final_itinerary(events)
+        await self.save_all()
+    
+    async def save_all(self):
+        if self._flusher is None:
+            # Nothing was ever logged; don't create an empty log folder
+            self._closed = True
+            return
+        if self._closed:
+            # Another save_all already queued the sentinel; just wait for it
+            await self._flusher
+            return
         self.log(f"\n📦 All logs saved to folder: {self.folder_name}")
+        self._queue.put_nowait(None)
+        self._closed = True
+        await self._flusher
 
 
 def parse_interests(interests: str) -> List[str]:
     """Parse interests string into array."""
-    return [i.strip() for i in interests.split(",") if i.strip()]
+    return list(_parse_interests_cached(interests))
+
+
+_INTEREST_SPLIT_RE = re.compile(r"\s*,\s*")
+
+
+@lru_cache(maxsize=1024)
+def _parse_interests_cached(interests: str) -> Tuple[str, ...]:
+    return tuple(i for i in _INTEREST_SPLIT_RE.split(interests.strip()) if i)
+
+
+# In-flight request coalescing: identical requests share one pipeline run.
+# Finished runs stay joinable for INFLIGHT_TTL seconds; failed runs are dropped
+# immediately so a retry starts fresh.
+INFLIGHT_TTL = 2.0
+INFLIGHT: Dict[tuple, asyncio.Future] = {}
+INFLIGHT_STREAMS: Dict[tuple, "StreamRun"] = {}
+
+# Idle SSE connections get a comment frame this often so proxies keep them open
+SSE_KEEPALIVE_INTERVAL = 15.0
+SSE_MAX_CHUNK = 16 * 1024
+
+
+def request_key(city: str, interests: List[str], start_date: str, end_date: str) -> tuple:
+    """Key identifying requests that would produce the same itinerary."""
+    return (city, tuple(sorted(interests)), start_date, end_date)
+
 
+def _expire_inflight(registry: Dict[tuple, Any], key: tuple, entry: Any):
+    """Drop a finished run unless a newer run already replaced it."""
+    if registry.get(key) is entry:
+        del registry[key]
 
 
+def send_event(event_type: str, data: Dict[str, Any]) -> bytes:
+    """Format an SSE frame."""
+    return b"data: " + orjson.dumps({"type": event_type, **data}) + b"\n\n"
 
 
+# Placeholder for the "complete" frame, which is rendered per subscriber
+COMPLETE_FRAME = object()
 
-from workflow import app as graph_app
 
-# ... (Logger class remains same, we will update how it's used or just let it log valid results)
+class StreamRun:
+    """One streaming pipeline run that any number of SSE clients can follow.
+    
+    Frames are buffered so clients joining late replay the progress so far.
+    """
+    
+    def __init__(self, request_id: str):
+        self.request_id = request_id  # the owner's, which ran the pipeline
+        self.frames: List[Any] = []  # encoded frames, or COMPLETE_FRAME
+        self.subscribers: List[asyncio.Queue] = []
+        self.done = False
+        self.task: Optional[asyncio.Task] = None
+        # Set on success; each subscriber renders "complete" with its own requestId
+        self.response: Optional[Dict[str, Any]] = None
+        self.events: Optional[List[Dict[str, Any]]] = None
+    
+    def publish(self, frame: bytes):
+        self.frames.append(frame)
+        for sub in self.subscribers:
+            sub.put_nowait(frame)
+    
+    def finish(self):
+        self.done = True
+        for sub in self.subscribers:
+            sub.put_nowait(None)
+    
+    def subscribe(self) -> asyncio.Queue:
+        sub: asyncio.Queue = asyncio.Queue()
+        for frame in self.frames:
+            sub.put_nowait(frame)
+        if self.done:
+            sub.put_nowait(None)
+        self.subscribers.append(sub)
+        return sub
+    
+    def unsubscribe(self, sub: asyncio.Queue):
+        if sub in self.subscribers:
+            self.subscribers.remove(sub)
+
 
 async def generate_itinerary(
     city: str,
@@ -164,7 +467,61 @@ async def generate_itinerary(
     end_date: str,
     logger: Logger
 ) -> Dict[str, Any]:
-    """Main orchestration function - uses LangGraph."""
+    """Main orchestration function - joins an identical in-flight run if any."""
+    key = request_key(city, interests, start_date, end_date)
+    pending = INFLIGHT.get(key)
+    if pending is not None:
+        logger.log("♻️ Joining in-flight run for an identical request")
+        return await asyncio.shield(pending)
+    
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    INFLIGHT[key] = future
+    result: Dict[str, Any] = {"success": False, "error": "Pipeline did not complete"}
+    try:
+        result = await run_pipeline(city, interests, start_date, end_date, logger)
+    finally:
+        future.set_result(result)
+        ttl = INFLIGHT_TTL if result["success"] else 0
+        loop.call_later(ttl, _expire_inflight, INFLIGHT, key, future)
+    return result
+
+
+async def run_pipeline(
+    city: str,
+    interests: List[str],
+    start_date: str,
+    end_date: str,
+    logger: Logger
+) -> Dict[str, Any]:
+    """Run the pipeline to completion and return only its result."""
+    result: Dict[str, Any] = {"success": False, "error": "Pipeline did not complete"}
+    try:
+        async for kind, data in pipeline_events(city, interests, start_date, end_date, logger):
+            if kind == "result":
+                result = data
+    except Exception as e:
+        logger.log(f"❌ Graph execution failed: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    return result
+
+
+async def pipeline_events(
+    city: str,
+    interests: List[str],
+    start_date: str,
+    end_date: str,
+    logger: Logger
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Run the Scout -> Explorer -> Planner graph - uses LangGraph.
+    
+    Shared by both itinerary endpoints. Yields (event_type, data) pairs as each
+    node finishes; the last pair is ("result", ...) with the events, coverage
+    and pipeline stats.
+    """
     logger.log(f"\n{'=' * 60}")
     logger.log("🚀 Starting Itinerary Generation Pipeline (LangGraph)")
     logger.log(f"{'=' * 60}")
@@ -179,44 +536,130 @@ async def generate_itinerary(
         "logs": []
     }
     
-    # Run the graph
-    try:
-        final_state = await graph_app.ainvoke(initial_state)
-    except Exception as e:
-        logger.log(f"❌ Graph execution failed: {e}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
+    yield "progress", {
+        "phase": "start",
+        "message": f"Planning your {city} adventure...",
+        "detail": "Initializing agent workflow..."
+    }
     
-    # Extract results
-    events = final_state.get("itinerary", [])
-    coverage = final_state.get("coverage", {})
-    logs = final_state.get("logs", [])
+    # Variables to capture state
+    captured_data: Dict[str, Any] = {
+        "scout_links": [],
+        "explorer_events": [],
+        "itinerary": [],
+        "coverage": {},
+        "cache_hit": False
+    }
     
-    # Log internal node logs
-    for log_msg in logs:
-        logger.log(f"[Graph] {log_msg}")
+    # Stream graph updates, plus the custom event the fused Scout/Explorer
+    # node emits once every search has finished
+    async for mode, chunk in app.state.graph.astream(
+        initial_state, stream_mode=["updates", "custom"]
+    ):
+        if mode == "custom":
+            if chunk.get("phase") == "scout_complete":
+                yield "progress", {
+                    "phase": "scout_complete",
+                    "message": f"Found {chunk['links']} potential events",
+                    "detail": "Scout phase complete. Analyzing links..."
+                }
+            continue
         
-    logger.log_final_itinerary(events)
-    
-    # Calculate stats for response compatibility
-    scout_links = final_state.get("scout_links", [])
-    explorer_events = final_state.get("explorer_events", [])
+        for node_name, node_state in chunk.items():
+            # Log internal node logs
+            for log_msg in node_state.get("logs", []):
+                logger.log(f"[Graph] {log_msg}")
+            
+            if node_name == "scout_explore":
+                events = node_state.get("explorer_events", [])
+                captured_data["scout_links"] = node_state.get("scout_links", [])
+                captured_data["cache_hit"] = node_state.get("cache_hit", False)
+                captured_data["explorer_events"] = events
+                yield "progress", {
+                    "phase": "explorer_complete",
+                    "message": "Analyzed events",
+                    "detail": f"Explorer phase complete. Found {len(events)} valid events."
+                }
+            
+            elif node_name == "planner":
+                itinerary = node_state.get("itinerary", [])
+                coverage = node_state.get("coverage", {})
+                captured_data["itinerary"] = itinerary
+                captured_data["coverage"] = coverage
+                yield "progress", {
+                    "phase": "organize",
+                    "message": "Itinerary organized",
+                    "detail": "Finalizing schedule..."
+                }
+                # Let the client render each day before the full payload arrives
+                for day_idx, (date, day) in enumerate(coverage.items()):
+                    yield "itinerary_day", {
+                        "day": day_idx,
+                        "date": date,
+                        "activities": day.get("events", [])
+                    }
     
+    yield "result", {
+        "success": True,
+        "events": captured_data["itinerary"],
+        "coverage": captured_data["coverage"],
+        "pipeline_stats": build_pipeline_stats(
+            captured_data["scout_links"],
+            captured_data["explorer_events"],
+            len(interests),
+            captured_data["cache_hit"]
+        )
+    }
+
+
+def build_itinerary_response(
+    request: GenerateItineraryRequest,
+    interest_array: List[str],
+    result: Dict[str, Any],
+    request_id: str
+) -> Dict[str, Any]:
+    """Response body returned by both itinerary endpoints."""
+    events = result["events"]
+    type_counts = Counter(e.get("type") for e in events)
     return {
         "success": True,
-        "events": events,
-        "coverage": coverage,
-        "scout_stats": {
-            "total_links_found": len(scout_links),
-            "searches_performed": len(interests) # Approximation
+        "city": request.city,
+        "interests": interest_array,
+        "date_range": {
+            "start": request.start_date,
+            "end": request.end_date
         },
-        "explorer_stats": {
-            "links_analyzed": len(scout_links),
-            "events_extracted": len(explorer_events),
-            "links_rejected": len(scout_links) - len(explorer_events)
-        }
+        "itinerary": events,
+        "itinerary_by_day": result["coverage"],
+        "total_items": len(events),
+        "events": type_counts["event"],
+        "activities": type_counts["activity"],
+        "pipeline_stats": result["pipeline_stats"],
+        "generated_at": _NOW_ISO,
+        "request_id": request_id
+    }
+
+
+def build_pipeline_stats(
+    scout_links: List[Dict[str, Any]],
+    explorer_events: List[Dict[str, Any]],
+    n_interests: int,
+    cache_hit: bool
+) -> Dict[str, Any]:
+    """Stats reported by both itinerary endpoints."""
+    n_links = len(scout_links)
+    n_events = len(explorer_events)
+    return {
+        "scout": {
+            "total_links_found": n_links,
+            "searches_performed": n_interests  # Approximation
+        },
+        "explorer": {
+            "links_analyzed": n_links,
+            "events_extracted": n_events,
+            "links_rejected": n_links - n_events
+        },
+        "cache_hit": cache_hit
     }
 
 
@@ -225,24 +668,38 @@ async def generate_itinerary(
 async def health_check():
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _NOW_ISO,
         "model": CONFIG["gemini_model"],
         "architecture": "Scout + Explorer Pipeline"
     }
 
 
 @app.get("/api/interests")
-async def get_interests():
-    return {
-        "success": True,
-        "categories": INTEREST_CATEGORIES,
-        "all_tags": get_all_tags()
+async def get_interests(request: Request):
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        etag, content, encoding = INTERESTS_GZIP_ETAG, INTERESTS_JSON_GZIP, "gzip"
+    else:
+        etag, content, encoding = INTERESTS_ETAG, INTERESTS_JSON, None
+    
+    # If-None-Match is checked against the variant we would actually send
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=3600",
+        "Vary": "Accept-Encoding"
     }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, media_type="application/json", headers=headers)
 
 
-@app.post("/api/generate-itinerary")
-async def generate_itinerary_endpoint(request: GenerateItineraryRequest):
-    request_id = str(int(datetime.now().timestamp() * 1000))
+@app.post("/api/generate-itinerary", openapi_extra=json_body(GenerateItineraryRequest))
+async def generate_itinerary_endpoint(http_request: Request):
+    request = await parse_body(http_request, GenerateItineraryRequest)
+    request_id = new_request_id()
     logger = Logger(request_id)
     
     try:
@@ -266,157 +723,100 @@ async def generate_itinerary_endpoint(request: GenerateItineraryRequest):
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result.get("message", "Failed to generate itinerary"))
         
-        response = {
-            "success": True,
-            "city": request.city,
-            "interests": interest_array,
-            "date_range": {
-                "start": request.start_date,
-                "end": request.end_date
-            },
-            "itinerary": result["events"],
-            "itinerary_by_day": result["coverage"],
-            "total_items": len(result["events"]),
-            "events": len([e for e in result["events"] if e.get("type") == "event"]),
-            "activities": len([e for e in result["events"] if e.get("type") == "activity"]),
-            "pipeline_stats": {
-                "scout": result["scout_stats"],
-                "explorer": result["explorer_stats"]
-            },
-            "generated_at": datetime.now().isoformat(),
-            "request_id": request_id
-        }
+        response = build_itinerary_response(request, interest_array, result, request_id)
         
-        logger.save_all()
+        # Logs don't need to hit disk before the client gets its response
+        run_in_background(logger.finalize(result["events"]))
         return response
         
     except HTTPException:
+        run_in_background(logger.save_all())
         raise
     except Exception as e:
         logger.log(f"❌ Error: {e}")
-        logger.save_all()
+        run_in_background(logger.save_all())
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/generate-itinerary-stream")
-async def generate_itinerary_stream(request: GenerateItineraryRequest):
+@app.post("/api/generate-itinerary-stream", openapi_extra=json_body(GenerateItineraryRequest))
+async def generate_itinerary_stream(http_request: Request):
     """Streaming itinerary generation endpoint (SSE) using LangGraph."""
-    request_id = str(int(datetime.now().timestamp() * 1000))
+    request = await parse_body(http_request, GenerateItineraryRequest)
+    request_id = new_request_id()
     logger = Logger(request_id)
+    run: Optional[StreamRun] = None
+    
+    def render(frame: Any) -> bytes:
+        if frame is COMPLETE_FRAME:
+            # Shared run, but each client sees its own request id
+            data = {**run.response, "request_id": request_id}
+            return send_event("complete", {"message": "Itinerary ready!", "data": data})
+        return frame
     
     async def event_generator():
-        def send_event(event_type: str, data: Dict[str, Any]):
-            return f"data: {json.dumps({'type': event_type, **data})}\n\n"
-        
-        yield send_event("connected", {"message": "Stream connected", "requestId": request_id})
-        
+        nonlocal run
+        owns_run = False
         try:
+            yield send_event("connected", {"message": "Stream connected", "requestId": request_id})
+            
             interest_array = parse_interests(request.interests)
             if not interest_array:
                 yield send_event("error", {"message": "At least one interest is required"})
                 return
             
-            initial_state = {
-                "city": request.city,
-                "interests": interest_array,
-                "start_date": request.start_date,
-                "end_date": request.end_date,
-                "scout_links": [],
-                "explorer_events": [],
-                "logs": []
-            }
-            
-            yield send_event("progress", {
-                "phase": "start",
-                "message": f"Planning your {request.city} adventure...",
-                "detail": f"Initializing agent workflow..."
-            })
-            
-            # Variables to capture state
-            captured_data = {
-                "scout_links": [],
-                "explorer_events": [],
-                "itinerary": [],
-                "coverage": {}
-            }
-            
-            # Stream graph updates
-            async for output in graph_app.astream(initial_state):
-                for node_name, node_state in output.items():
-                    if node_name == "scout":
-                        links = node_state.get("scout_links", [])
-                        captured_data["scout_links"] = links
-                        yield send_event("progress", {
-                            "phase": "scout_complete",
-                            "message": f"Found {len(links)} potential events",
-                            "detail": "Scout phase complete. Analyzing links..."
-                        })
-                        
-                    elif node_name == "explorer":
-                        events = node_state.get("explorer_events", [])
-                        captured_data["explorer_events"] = events
-                        yield send_event("progress", {
-                            "phase": "explorer_complete",
-                            "message": f"Analyzed events",
-                            "detail": f"Explorer phase complete. Found {len(events)} valid events."
-                        })
-                    
-                    elif node_name == "planner":
-                        itinerary = node_state.get("itinerary", [])
-                        coverage = node_state.get("coverage", {})
-                        captured_data["itinerary"] = itinerary
-                        captured_data["coverage"] = coverage
-                        yield send_event("progress", {
-                            "phase": "organize",
-                            "message": "Itinerary organized",
-                            "detail": "Finalizing schedule..."
-                        })
-
-            # Construct final response
-            events = captured_data["itinerary"]
-            coverage = captured_data["coverage"]
-            scout_links = captured_data["scout_links"]
-            explorer_events = captured_data["explorer_events"]
-            
-            # Calculate stats
-            scout_stats = {
-                "total_links_found": len(scout_links),
-                "searches_performed": len(interest_array)
-            }
-            explorer_stats = {
-                "links_analyzed": len(scout_links),
-                "events_extracted": len(explorer_events),
-                "links_rejected": len(scout_links) - len(explorer_events)
-            }
-            
-            # Log final results to file
-            logger.log_final_itinerary(events)
+            # Follow an identical in-flight run, or start one
+            key = request_key(request.city, interest_array, request.start_date, request.end_date)
+            run = INFLIGHT_STREAMS.get(key)
+            owns_run = run is None
+            if owns_run:
+                run = StreamRun(request_id)
+                INFLIGHT_STREAMS[key] = run
+                run.task = run_in_background(
+                    stream_pipeline(run, key, request, interest_array, request_id, logger)
+                )
+            else:
+                logger.log(f"♻️ Joining in-flight stream {run.request_id} for an identical request")
             
-            response = {
-                "success": True,
-                "city": request.city,
-                "interests": interest_array,
-                "date_range": {"start": request.start_date, "end": request.end_date},
-                "itinerary": events,
-                "itinerary_by_day": coverage,
-                "total_items": len(events),
-                "events": len([e for e in events if e.get("type") == "event"]),
-                "activities": len([e for e in events if e.get("type") == "activity"]),
-                "pipeline_stats": {
-                    "scout": scout_stats,
-                    "explorer": explorer_stats
-                },
-                "generated_at": datetime.now().isoformat(),
-                "request_id": request_id
-            }
-            
-            yield send_event("complete", {"message": "Itinerary ready!", "data": response})
-            logger.save_all()
-            
-        except Exception as e:
-            logger.log(f"❌ Error: {e}")
-            logger.save_all()
-            yield send_event("error", {"message": str(e)})
+            sub = run.subscribe()
+            try:
+                while True:
+                    try:
+                        frame = await asyncio.wait_for(sub.get(), timeout=SSE_KEEPALIVE_INTERVAL)
+                    except asyncio.TimeoutError:
+                        yield b": ping\n\n"
+                        continue
+                    if frame is None:
+                        break
+                    frame = render(frame)
+                    # Frames published in a burst go out as one socket write
+                    chunk = [frame]
+                    size = len(frame)
+                    finished = False
+                    while size < SSE_MAX_CHUNK and not sub.empty():
+                        frame = sub.get_nowait()
+                        if frame is None:
+                            finished = True
+                            break
+                        frame = render(frame)
+                        chunk.append(frame)
+                        size += len(frame)
+                    yield b"".join(chunk)
+                    if finished or await http_request.is_disconnected():
+                        break
+            finally:
+                run.unsubscribe(sub)
+                # Nobody is listening any more; stop spending Gemini calls on it
+                if not run.subscribers and not run.done:
+                    run.task.cancel()
+        finally:
+            # The pipeline task finalizes the owner's logger; everyone else
+            # (joiners, and requests that ended before a run started) saves here
+            if not owns_run:
+                if run is not None and run.events is not None:
+                    logger.log(f"♻️ Reused itinerary from stream {run.request_id}")
+                    run_in_background(logger.finalize(run.events))
+                else:
+                    run_in_background(logger.save_all())
     
     return StreamingResponse(
         event_generator(),
@@ -429,36 +829,76 @@ async def generate_itinerary_stream(request: GenerateItineraryRequest):
     )
 
 
-@app.post("/api/edit-itinerary")
-async def edit_itinerary_endpoint(request: EditItineraryRequest):
-    request_id = str(int(datetime.now().timestamp() * 1000))
+async def stream_pipeline(
+    run: StreamRun,
+    key: tuple,
+    request: GenerateItineraryRequest,
+    interest_array: List[str],
+    request_id: str,
+    logger: Logger
+):
+    """Run the graph for a streaming request and publish progress to all subscribers."""
+    succeeded = False
+    result: Dict[str, Any] = {}
+    try:
+        async for kind, data in pipeline_events(
+            request.city, interest_array, request.start_date, request.end_date, logger
+        ):
+            if kind == "result":
+                result = data
+            else:
+                run.publish(send_event(kind, data))
+        
+        run.response = build_itinerary_response(request, interest_array, result, request_id)
+        run.events = result["events"]
+        run.publish(COMPLETE_FRAME)
+        succeeded = True
+        
+    except asyncio.CancelledError:
+        logger.log("🔌 Client disconnected; cancelling pipeline")
+    except Exception as e:
+        logger.log(f"❌ Error: {e}")
+        run.publish(send_event("error", {"message": str(e)}))
+    finally:
+        run.finish()
+        ttl = INFLIGHT_TTL if succeeded else 0
+        asyncio.get_running_loop().call_later(ttl, _expire_inflight, INFLIGHT_STREAMS, key, run)
+    
+    # Subscribers already have their final frame; write logs afterwards
+    await logger.finalize(result["events"] if succeeded else None)
+
+
+@app.post("/api/edit-itinerary", openapi_extra=json_body(EditItineraryRequest))
+async def edit_itinerary_endpoint(http_request: Request):
+    request = await parse_body(http_request, EditItineraryRequest)
+    request_id = new_request_id()
     
     try:
-        print(f"\n📝 Edit Request [{request_id}]")
-        print(f"   City: {request.city}")
-        print(f"   Edit: \"{request.edit_request}\"")
-        print(f"   Activity: {request.current_activity.get('name')}")
+        edit_log.info(f"\n📝 Edit Request [{request_id}]")
+        edit_log.info(f"   City: {request.city}")
+        edit_log.info(f"   Edit: \"{request.edit_request}\"")
+        edit_log.info(f"   Activity: {request.current_activity.get('name')}")
         
         edit_result = await process_edit_request(
             edit_request=request.edit_request,
             current_activity=request.current_activity,
             city=request.city or "Unknown City",
-            day_date=request.day_date or datetime.now().strftime("%Y-%m-%d"),
+            day_date=request.day_date or _NOW_ISO[:10],
             interests=request.interests or []
         )
         
-        print(f"✅ Edit processed: {edit_result.get('operation')}")
-        print(f"   Summary: {edit_result.get('change_summary')}")
+        edit_log.info(f"✅ Edit processed: {edit_result.get('operation')}")
+        edit_log.info(f"   Summary: {edit_result.get('change_summary')}")
         
         return {
             "success": True,
             **edit_result,
             "request_id": request_id,
-            "processed_at": datetime.now().isoformat()
+            "processed_at": _NOW_ISO
         }
         
     except Exception as e:
-        print(f"❌ Edit Error [{request_id}]: {e}")
+        edit_log.error(f"❌ Edit Error [{request_id}]: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -470,6 +910,7 @@ if __name__ == "__main__":
     print("=" * 60)
     print(f"📡 Server: http://localhost:{CONFIG['port']}")
     print(f"🤖 Model: {CONFIG['gemini_model']}")
+    print(f"👷 Workers: {CONFIG['workers']} ({'uvloop' if HAS_UVLOOP else 'asyncio'} event loop)")
     print("🔧 Endpoints:")
     print("   GET  /health")
     print("   GET  /api/interests")
@@ -484,4 +925,20 @@ if __name__ == "__main__":
     print("=" * 60)
     print("\n✅ Ready to generate itineraries!\n")
     
-    uvicorn.run(app, host="0.0.0.0", port=CONFIG["port"])
+    # Multiple workers need an import string; each worker imports this module
+    uvicorn.run(
+        "api_server:app",
+        app_dir=str(Path(__file__).parent),
+        host="0.0.0.0",
+        port=CONFIG["port"],
+        workers=CONFIG["workers"],
+        loop="uvloop" if HAS_UVLOOP else "asyncio",
+        http="httptools",
+        # Keep idle connections open well past the browser's next edit request
+        # (the 5s default drops them between a stream and the follow-up call)
+        timeout_keep_alive=75,
+        limit_concurrency=CONFIG["max_connections"],
+        backlog=2048,
+        access_log=False,
+        log_level="warning"
+    )
@@ -0,0 +1,138 @@
+"""
+Cache Module - Result caches
+Bounded FIFO caches with per-entry expiry for Scout links and Explorer events,
+plus an SQLite-backed variant that survives restarts and is shared by workers
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import orjson
+
+DISK_CACHE_PATH = os.getenv("DISK_CACHE_PATH", ".cache/navis.sqlite3")
+
+
+class TTLCache:
+    """Capacity-bounded cache with FIFO eviction and per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the oldest entries beyond capacity."""
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """SQLite-backed cache with per-entry TTL, shared across processes.
+
+    Accessed in bulk and off the event loop (get_many/set_many run one
+    statement per call in a worker thread), since the database file is
+    shared by every uvicorn worker and a write lock can block for up to the
+    busy timeout. Keys and values must be JSON serializable (tuples come
+    back as lists). Storage errors are treated as cache misses so a
+    read-only or full disk never fails a request.
+    """
+
+    # Expired rows are purged every this many writes
+    PURGE_EVERY = 100
+    # Keys per SELECT, below SQLite's bound-parameter limit
+    CHUNK_SIZE = 500
+
+    def __init__(self, namespace: str, ttl: float, path: str = DISK_CACHE_PATH):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()  # one connection, used from worker threads
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so each worker process gets its own connection
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "namespace TEXT NOT NULL, key BLOB NOT NULL, expires_at REAL NOT NULL, "
+                "value BLOB NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            self._conn = conn
+        return self._conn
+
+    async def get_many(self, keys: Sequence[Hashable]) -> List[Optional[Any]]:
+        """Cached values in key order; None where missing, expired or unreadable."""
+        if not keys:
+            return []
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def set_many(self, items: Sequence[Tuple[Hashable, Any]]):
+        """Store several values in one transaction; failures are ignored."""
+        if items:
+            await asyncio.to_thread(self._set_many, items)
+
+    def _get_many(self, keys: Sequence[Hashable]) -> List[Optional[Any]]:
+        encoded = [orjson.dumps(key) for key in keys]
+        found: Dict[bytes, bytes] = {}
+        try:
+            with self._lock:
+                conn = self._connect()
+                now = time.time()
+                for i in range(0, len(encoded), self.CHUNK_SIZE):
+                    chunk = encoded[i:i + self.CHUNK_SIZE]
+                    found.update(conn.execute(
+                        "SELECT key, value FROM entries WHERE namespace = ? AND expires_at >= ? "
+                        f"AND key IN ({', '.join('?' * len(chunk))})",
+                        (self.namespace, now, *chunk)
+                    ).fetchall())
+        except (sqlite3.Error, OSError):
+            return [None] * len(keys)
+        return [orjson.loads(found[key]) if key in found else None for key in encoded]
+
+    def _set_many(self, items: Sequence[Tuple[Hashable, Any]]):
+        now = time.time()
+        try:
+            rows = [
+                (self.namespace, orjson.dumps(key), now + self.ttl, orjson.dumps(value))
+                for key, value in items
+            ]
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("BEGIN")
+                    conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", rows)
+                    self._writes += len(rows)
+                    if self._writes >= self.PURGE_EVERY:
+                        self._writes = 0
+                        conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        except (sqlite3.Error, OSError, orjson.JSONEncodeError):
+            pass
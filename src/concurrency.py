@@ -0,0 +1,111 @@
+"""
+Concurrency Module - Rate-limit aware scheduling for Gemini calls
+Adaptive (AIMD) concurrency limit and a dedicated executor for Gemini calls
+"""
+
+import os
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Deque, List, Optional
+
+from google.genai import errors
+
+
+# Blocking Gemini SDK calls from Scout and Explorer run here rather than on the
+# default executor shared with log serialization. Sized for both modules'
+# process-wide limits (48 searches + 12 batches) plus housekeeping calls.
+GEMINI_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GEMINI_MAX_WORKERS", "64")),
+    thread_name_prefix="gemini"
+)
+
+
+async def run_gemini(func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking Gemini SDK call on the dedicated executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(GEMINI_EXECUTOR, partial(func, *args, **kwargs))
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True if Gemini rejected the call for exceeding its rate limit/quota."""
+    return isinstance(error, errors.APIError) and error.code == 429
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that follows Gemini's rate-limit feedback (AIMD).
+
+    The limit halves whenever a call is throttled and grows by one after a
+    full window of successes, staying between 1 and max_limit. State lives
+    on the instance, so a module-level limiter is a process-wide ceiling
+    that adapts across requests; run()/gather() can additionally bound a
+    single request so one large request can't take every slot.
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self._active = 0
+        self._successes = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we were cancelled
+                self.release()
+            raise
+
+    def release(self):
+        self._active -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self._active < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+            self._wake()
+
+    def on_throttle(self):
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    async def run(self, task: Awaitable[Any], bound: Optional[asyncio.Semaphore] = None) -> Any:
+        """Await one awaitable once a slot is free (in `bound` too, if given)."""
+        if bound is None:
+            async with self:
+                return await task
+        # Take the per-request slot first so waiting requests don't queue
+        # for shared slots they couldn't use yet
+        async with bound, self:
+            return await task
+
+    async def gather(self, tasks: List[Awaitable[Any]], bound: Optional[asyncio.Semaphore] = None) -> List[Any]:
+        """Run awaitables under the limit (and `bound`); results keep the input order."""
+        async with asyncio.TaskGroup() as tg:
+            running = [tg.create_task(self.run(t, bound)) for t in tasks]
+        return [t.result() for t in running]
@@ -5,9 +5,12 @@ Handles individual activity modifications using Gemini AI
 
 import os
 import json
-import re
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from typing import Dict, Any, List, Optional
 
+import orjson
 from google import genai
 
 CONFIG = {
@@ -18,6 +21,10 @@ CONFIG = {
 # Gemini client (lazy init)
 _client: Optional[genai.Client] = None
 
+# Blocking Gemini calls get their own threads so a burst of edits doesn't
+# queue behind (or starve) log writes on the default executor
+_EDIT_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gemini-edit")
+
 
 def get_client() -> genai.Client:
     """Get or create Gemini client."""
@@ -29,29 +36,8 @@ def get_client() -> genai.Client:
     return _client
 
 
-async def process_edit_request(
-    edit_request: str,
-    current_activity: Dict[str, Any],
-    city: str,
-    day_date: str,
-    interests: Optional[List[str]] = None
-) -> Dict[str, Any]:
-    """
-    Edit a single activity using AI.
-    
-    Args:
-        edit_request: User's edit request
-        current_activity: Current activity to edit
-        city: City name
-        day_date: Date of the activity
-        interests: User interests
-    
-    Returns:
-        Edit result
-    """
-    import asyncio
-    
-    system_prompt = f"""You are an itinerary editing assistant. Your job is to help users modify their travel plans.
+# Only {city} varies; formatted prompts are cached per city
+EDIT_SYSTEM_PROMPT = """You are an itinerary editing assistant. Your job is to help users modify their travel plans.
 
 You MUST respond with ONLY valid JSON (no markdown, no backticks, no explanation).
 
@@ -103,14 +89,69 @@ For "update_time" operation:
   "change_summary": "Changed time to X"
 }}"""
 
+
+@lru_cache(maxsize=256)
+def system_prompt_for(city: str) -> str:
+    """System prompt for edits in the given city."""
+    return EDIT_SYSTEM_PROMPT.format(city=city)
+
+
+def parse_model_json(text: str) -> Dict[str, Any]:
+    """Parse a model reply that may be wrapped in a markdown code fence or extra text."""
+    text = text.strip()
+    if text.startswith("```"):
+        # Drop the opening fence line (``` or ```json) and the closing fence
+        text = text.partition("\n")[2].removesuffix("```").strip()
+    
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    
+    # Model added prose around the object; keep the outermost braces
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end <= start:
+        raise ValueError(f"No JSON found in response: {text[:200]}")
+    try:
+        return orjson.loads(text[start:end + 1])
+    except orjson.JSONDecodeError:
+        raise ValueError(f"Model did not return valid JSON: {text[:200]}")
+
+
+async def process_edit_request(
+    edit_request: str,
+    current_activity: Dict[str, Any],
+    city: str,
+    day_date: str,
+    interests: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Edit a single activity using AI.
+    
+    Args:
+        edit_request: User's edit request
+        current_activity: Current activity to edit
+        city: City name
+        day_date: Date of the activity
+        interests: User interests
+    
+    Returns:
+        Edit result
+    """
     interests_str = ", ".join(interests) if interests else "general"
+    try:
+        activity_json = orjson.dumps(current_activity, option=orjson.OPT_INDENT_2).decode()
+    except orjson.JSONEncodeError:
+        # Client JSON orjson rejects (ints wider than 64 bits, non-str keys)
+        activity_json = json.dumps(current_activity, indent=2, default=str)
     
     user_prompt = f"""City: {city}
 Date: {day_date}
 User interests: {interests_str}
 
 Current activity:
-{json.dumps(current_activity, indent=2)}
+{activity_json}
 
 User's edit request: "{edit_request}"
 
@@ -118,47 +159,24 @@ Provide the appropriate edit response as JSON."""
 
     try:
         client = get_client()
-        response = await asyncio.to_thread(
-            client.models.generate_content,
-            model=CONFIG["gemini_model"],
-            contents=system_prompt + "\n\n" + user_prompt,
-            config={
-                "temperature": 0.3,
-                "max_output_tokens": 2048,
-            }
+        response = await asyncio.get_running_loop().run_in_executor(
+            _EDIT_EXECUTOR,
+            partial(
+                client.models.generate_content,
+                model=CONFIG["gemini_model"],
+                contents="".join((system_prompt_for(city), "\n\n", user_prompt)),
+                config={
+                    "temperature": 0.3,
+                    "max_output_tokens": 2048,
+                }
+            )
         )
         
         text = response.text
         if not text:
             raise ValueError("AI model returned empty response. Please try again.")
         
-        # Parse JSON from response
-        try:
-            parsed = json.loads(text)
-        except json.JSONDecodeError:
-            # Try to extract from markdown code block
-            code_match = re.search(r'```json\s*([\s\S]*?)\s*```', text, re.IGNORECASE)
-            if code_match:
-                try:
-                    parsed = json.loads(code_match.group(1).strip())
-                except json.JSONDecodeError:
-                    parsed = None
-            else:
-                parsed = None
-            
-            # Try to extract JSON if model added extra text
-            if not parsed:
-                start = text.find("{")
-                end = text.rfind("}")
-                if start >= 0 and end > start:
-                    try:
-                        parsed = json.loads(text[start:end + 1])
-                    except json.JSONDecodeError:
-                        raise ValueError(f"Model did not return valid JSON: {text[:200]}")
-                else:
-                    raise ValueError(f"No JSON found in response: {text[:200]}")
-        
-        return parsed
+        return parse_model_json(text)
         
     except Exception as e:
         print(f"AI processing error: {e}")
@@ -4,19 +4,142 @@ Analyzes links from Scout using parallel batch processing
 """
 
 import os
-import json
 import asyncio
 import re
-from typing import List, Dict, Any, Callable, Optional
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable, List, Dict, Any, Callable, Optional, Tuple
 
+import orjson
 from google import genai
+from google.genai import errors
+from pydantic import BaseModel
+
+from cache import DiskCache, TTLCache
+from concurrency import AdaptiveLimiter, is_rate_limited, run_gemini
+from planner import start_time_key
 
 CONFIG = {
     "google_api_key": os.getenv("GOOGLE_API_KEY"),
     "gemini_model": os.getenv("GEMINI_MODEL", "gemini-2.0-flash"),
     "batch_size": 5,
+    # Per request; all requests in the process share max_global_batches,
+    # which adapts downward when Gemini throttles
     "max_concurrent_batches": 3,
+    "max_global_batches": int(os.getenv("EXPLORER_MAX_GLOBAL_BATCHES", "12")),
+    # "live" calls Gemini per batch; "batch" submits one Batch Mode job
+    # (half the price, no RPM ceiling, but minutes-to-hours turnaround)
+    "mode": os.getenv("EXPLORER_MODE", "live"),
+    "batch_poll_interval": 10,
+    "batch_timeout": int(os.getenv("EXPLORER_BATCH_TIMEOUT", "3600")),
+    # Off by default: the instructions (~600 tokens) are below the minimum
+    # size Gemini accepts for an explicit cache on the default models
+    "context_cache": os.getenv("EXPLORER_CONTEXT_CACHE", "0") == "1",
+}
+
+# Response schema for ungrounded batches
+class EventLocation(BaseModel):
+    venue: str
+    address: str
+    city: str
+
+
+class EventCoordinates(BaseModel):
+    lat: float
+    lng: float
+
+
+class EventSource(BaseModel):
+    platform: str
+    url: str
+
+
+class EventPricing(BaseModel):
+    is_free: bool
+    price: str
+    currency: str
+
+
+class AnalyzedEvent(BaseModel):
+    name: str
+    type: str
+    category: str
+    location: EventLocation
+    coordinates: Optional[EventCoordinates]
+    start_time: str
+    end_time: Optional[str]
+    duration_minutes: Optional[int]
+    description: str
+    source: EventSource
+    pricing: EventPricing
+    tags: List[str]
+
+
+class RejectedLink(BaseModel):
+    url: str
+    reason: str
+
+
+class BatchAnalysis(BaseModel):
+    """Response schema for one analyzed batch (mirrors the prompt's OUTPUT FORMAT)."""
+    analyzed_links: int
+    valid_events: List[AnalyzedEvent]
+    rejected_links: List[RejectedLink]
+
+
+# The prompt already carries each link's URL/title/snippet, so batches are
+# analyzed without Google Search grounding; only links whose snippet is too
+# thin to go on get a grounded call.
+# Ungrounded calls get structured JSON output; Gemini doesn't combine a JSON
+# response schema with the google_search tool, so grounded calls (and Scout)
+# still rely on extract_json's fallbacks.
+GENERATION_CONFIG = {
+    "temperature": 0.1,
+    "max_output_tokens": 8192,
+    "response_mime_type": "application/json",
+    "response_schema": BatchAnalysis,
 }
+GROUNDED_GENERATION_CONFIG = {
+    "temperature": GENERATION_CONFIG["temperature"],
+    "max_output_tokens": GENERATION_CONFIG["max_output_tokens"],
+    "tools": [{"google_search": {}}],
+}
+MIN_SNIPPET_CHARS = 40
+
+# Explicit Gemini context caches for the analysis instructions, per city.
+# Caches are never deleted explicitly: each one expires on the server
+# CONTEXT_CACHE_TTL after creation, which bounds what an evicted or forgotten
+# cache is billed for. Names are forgotten a few minutes before that.
+CONTEXT_CACHE_TTL = 3600
+CONTEXT_CACHES = TTLCache(max_entries=256, ttl=CONTEXT_CACHE_TTL - 300)
+_pending_context_caches: Dict[str, asyncio.Future] = {}
+_context_cache_supported = True
+# Error text Gemini uses when content is below the cache minimum or the
+# model can't be cached at all
+CACHE_UNSUPPORTED_HINTS = ("too small", "min_total_token_count", "not supported")
+
+BATCH_JOB_DONE_STATES = frozenset({
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_PARTIALLY_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+})
+
+# Substring match, like the keyword loop it replaces ("virtually", "zoom-in")
+ONLINE_KEYWORDS_RE = re.compile("|".join(map(re.escape, [
+    "online", "virtual", "remote", "zoom", "webinar",
+    "livestream", "google meet", "teams", "webex",
+    "discord", "streaming"
+])))
+PLACEHOLDER_LOCATIONS = frozenset({"", "tbd", "online", "virtual"})
+
+# Live batch calls adapt their process-wide concurrency to Gemini's rate limiting
+BATCH_LIMITER = AdaptiveLimiter(CONFIG["max_global_batches"])
+
+# Extracted events per (city, link URL), on disk like Scout's search cache.
+# Keyed on the city too: the prompt only keeps events in person in that city.
+EVENT_CACHE = DiskCache("explorer", ttl=24 * 3600)
 
 # Gemini client (lazy init)
 _client: Optional[genai.Client] = None
@@ -32,23 +155,10 @@ def get_client() -> genai.Client:
     return _client
 
 
-def build_analysis_prompt(links: List[Dict[str, Any]], city: str) -> str:
-    """Build prompt for analyzing a batch of links."""
-    links_info = "\n---".join([
-        f"""
-[Link {i + 1}]
-URL: {link.get('url')}
-Title: {link.get('title', 'Unknown')}
-Snippet: {link.get('snippet', 'No snippet')}
-Interest: {link.get('interest')}
-Platform: {link.get('platform', 'Unknown')}"""
-        for i, link in enumerate(links)
-    ])
-    
-    return f"""You are an Expert Event Analyzer. Analyze these event links and extract details.
-
-## LINKS TO ANALYZE:
-{links_info}
+@lru_cache(maxsize=256)
+def build_analysis_instructions(city: str) -> str:
+    """Static part of the analysis prompt; identical for every batch in a city."""
+    return f"""You are an Expert Event Analyzer. Analyze the event links you are given and extract details.
 
 ## CRITERIA FOR VALID EVENTS:
 1. Must have a specific start time (not just "Open 10am-6pm")
@@ -71,7 +181,7 @@ Platform: {link.get('platform', 'Unknown')}"""
 
 ## OUTPUT FORMAT (JSON only):
 {{
-  "analyzed_links": {len(links)},
+  "analyzed_links": <number of links analyzed>,
   "valid_events": [
     {{
       "name": "Event Name",
@@ -96,36 +206,128 @@ Platform: {link.get('platform', 'Unknown')}"""
 Output ONLY valid JSON. Start with {{ end with }}"""
 
 
-def is_online_event(event: Dict[str, Any]) -> bool:
-    """Check if an event is online/virtual."""
-    online_keywords = [
-        "online", "virtual", "remote", "zoom", "webinar",
-        "livestream", "google meet", "teams", "webex",
-        "discord", "streaming"
-    ]
+LINK_TEMPLATE = """
+[Link {number}]
+URL: {url}
+Title: {title}
+Snippet: {snippet}
+Interest: {interest}
+Platform: {platform}"""
+
+
+def build_links_section(links: List[Dict[str, Any]]) -> str:
+    """Per-batch part of the analysis prompt."""
+    links_info = "\n---".join([
+        LINK_TEMPLATE.format(
+            number=i + 1,
+            url=link.get("url"),
+            title=link.get("title", "Unknown"),
+            snippet=link.get("snippet", "No snippet"),
+            interest=link.get("interest"),
+            platform=link.get("platform", "Unknown")
+        )
+        for i, link in enumerate(links)
+    ])
     
-    fields_to_check = [
-        event.get("location", {}).get("venue", ""),
-        event.get("location", {}).get("address", ""),
-        event.get("name", ""),
-        event.get("description", "")
-    ]
-    fields_to_check = [f.lower() for f in fields_to_check if f]
+    return f"## LINKS TO ANALYZE ({len(links)}):\n{links_info}"
+
+
+def needs_grounding(link: Dict[str, Any]) -> bool:
+    """True if the link's snippet is too thin to analyze without a web lookup."""
+    return len((link.get("snippet") or "").strip()) < MIN_SNIPPET_CHARS
+
+
+def generation_config(links: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Grounded config only when some link in the batch needs a lookup."""
+    if any(needs_grounding(link) for link in links):
+        return GROUNDED_GENERATION_CONFIG
+    return GENERATION_CONFIG
+
+
+def build_analysis_prompt(links: List[Dict[str, Any]], city: str) -> str:
+    """Build prompt for analyzing a batch of links.
     
-    for field in fields_to_check:
-        for keyword in online_keywords:
-            if keyword in field:
-                return True
+    The static instructions lead so batches share a common prefix
+    (Gemini's implicit prompt caching keys on prefixes).
+    """
+    return build_analysis_instructions(city) + "\n\n" + build_links_section(links)
+
+
+def is_cache_unsupported(error: BaseException) -> bool:
+    """True if Gemini rejected the cache itself rather than failing transiently."""
+    if not isinstance(error, errors.ClientError) or error.code not in (400, 404):
+        return False
+    message = str(error).lower()
+    return any(hint in message for hint in CACHE_UNSUPPORTED_HINTS)
+
+
+async def get_instruction_cache(city: str, logger: Callable[[str], None]) -> Optional[str]:
+    """Name of an explicit context cache holding the city's instructions, or None.
     
-    location = event.get("location", {})
-    if location:
-        venue = (location.get("venue") or "").lower()
-        address = (location.get("address") or "").lower()
-        if not address or address in ["tbd", "online", "virtual"]:
-            if not venue or venue in ["online", "virtual", "tbd"]:
-                return True
+    Falls back to sending the full prompt (returns None) when caching is
+    disabled or the cache can't be created. Only a rejection of the cache
+    itself (too small, unsupported model) disables caching for the process;
+    transient failures just skip it for this batch. Concurrent batches for
+    the same city share one creation call.
+    """
+    if not CONFIG["context_cache"] or not _context_cache_supported:
+        return None
+    
+    name = CONTEXT_CACHES.get(city)
+    if name is not None:
+        return name
+    
+    pending = _pending_context_caches.get(city)
+    if pending is None:
+        pending = asyncio.ensure_future(create_instruction_cache(city, logger))
+        _pending_context_caches[city] = pending
+        pending.add_done_callback(lambda _: _pending_context_caches.pop(city, None))
+    return await asyncio.shield(pending)
+
+
+async def create_instruction_cache(city: str, logger: Callable[[str], None]) -> Optional[str]:
+    global _context_cache_supported
+    try:
+        cache = await run_gemini(
+            get_client().caches.create,
+            model=CONFIG["gemini_model"],
+            config={
+                "system_instruction": build_analysis_instructions(city),
+                "ttl": f"{CONTEXT_CACHE_TTL}s",
+                "display_name": f"explorer-{city}",
+            }
+        )
+    except Exception as e:
+        if is_cache_unsupported(e):
+            _context_cache_supported = False
+            logger(f"⚠️ Explorer: Context caching unavailable, sending full prompts ({e})")
+        else:
+            logger(f"⚠️ Explorer: Context cache creation failed, sending full prompt ({e})")
+        return None
+    CONTEXT_CACHES.set(city, cache.name)
+    return cache.name
+
+
+def is_online_event(event: Dict[str, Any]) -> bool:
+    """Check if an event is online/virtual."""
+    location = event.get("location") or {}
+    venue = (location.get("venue") or "").lower()
+    address = (location.get("address") or "").lower()
+    text = "\x00".join((
+        venue,
+        address,
+        (event.get("name") or "").lower(),
+        (event.get("description") or "").lower()
+    ))
     
-    return False
+    # A given location whose venue and address are both blank/placeholders
+    return bool(ONLINE_KEYWORDS_RE.search(text)) or (
+        bool(location) and venue in PLACEHOLDER_LOCATIONS and address in PLACEHOLDER_LOCATIONS
+    )
+
+
+JSON_CODE_BLOCK_RE = re.compile(r'```json\s*([\s\S]*?)\s*```', re.IGNORECASE)
+JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
 
 
 def extract_json(text: str) -> Dict[str, Any]:
@@ -134,27 +336,64 @@ def extract_json(text: str) -> Dict[str, Any]:
         raise ValueError("Empty response text")
     
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         pass
     
-    code_match = re.search(r'```json\s*([\s\S]*?)\s*```', text, re.IGNORECASE)
+    code_match = JSON_CODE_BLOCK_RE.search(text)
     if code_match:
         try:
-            return json.loads(code_match.group(1).strip())
-        except json.JSONDecodeError:
+            return orjson.loads(code_match.group(1).strip())
+        except orjson.JSONDecodeError:
             pass
     
-    json_match = re.search(r'\{[\s\S]*\}', text)
+    json_match = JSON_OBJECT_RE.search(text)
     if json_match:
         try:
-            return json.loads(json_match.group(0))
-        except json.JSONDecodeError:
+            return orjson.loads(json_match.group(0))
+        except orjson.JSONDecodeError:
             pass
     
     raise ValueError("Could not extract JSON from Explorer response")
 
 
+def parse_batch_response(
+    links: List[Dict[str, Any]],
+    response_text: str,
+    batch_num: int,
+    total_batches: int,
+    logger: Callable[[str], None]
+) -> Dict[str, Any]:
+    """Turn one batch's model output into a batch result."""
+    result = extract_json(response_text)
+    
+    events_count = len(result.get("valid_events", []))
+    logger(f"✅ Batch {batch_num}/{total_batches}: Found {events_count} valid events")
+    
+    return {
+        "success": True,
+        "events": result.get("valid_events", []),
+        "rejected": result.get("rejected_links", []),
+        "analyzed": result.get("analyzed_links", len(links))
+    }
+
+
+def failed_batch(
+    links: List[Dict[str, Any]],
+    error: Exception,
+    batch_num: int,
+    total_batches: int,
+    logger: Callable[[str], None]
+) -> Dict[str, Any]:
+    logger(f"❌ Batch {batch_num}/{total_batches}: Failed - {error}")
+    return {
+        "success": False,
+        "events": [],
+        "rejected": [{"url": link["url"], "reason": str(error)} for link in links],
+        "error": str(error)
+    }
+
+
 async def analyze_batch(
     links: List[Dict[str, Any]],
     city: str,
@@ -164,51 +403,200 @@ async def analyze_batch(
 ) -> Dict[str, Any]:
     """Analyze a batch of links."""
     client = get_client()
-    prompt = build_analysis_prompt(links, city)
     
     try:
-        response = await asyncio.to_thread(
+        config = generation_config(links)
+        # Cached contents can't take extra tools, so grounded batches send the full prompt
+        cache_name = None if "tools" in config else await get_instruction_cache(city, logger)
+        if cache_name:
+            # Instructions live in the cache; send only the links
+            contents = build_links_section(links)
+            config = {"cached_content": cache_name, **config}
+        else:
+            contents = build_analysis_prompt(links, city)
+        
+        response = await run_gemini(
             client.models.generate_content,
             model=CONFIG["gemini_model"],
-            contents=prompt,
-            config={
-                "tools": [{"google_search": {}}],
-                "temperature": 0.1,
-                "max_output_tokens": 8192,
-            }
+            contents=contents,
+            config=config
         )
+        BATCH_LIMITER.on_success()
+        return parse_batch_response(links, response.text, batch_num, total_batches, logger)
+    except Exception as e:
+        if is_rate_limited(e):
+            BATCH_LIMITER.on_throttle()
+        return failed_batch(links, e, batch_num, total_batches, logger)
+
+
+async def analyze_batches_offline(
+    batches: List[List[Dict[str, Any]]],
+    city: str,
+    logger: Callable[[str], None]
+) -> List[Dict[str, Any]]:
+    """Analyze all batches in one Gemini Batch Mode job (one inlined request per batch)."""
+    client = get_client()
+    total = len(batches)
+    requests = [
+        {
+            "contents": [{"role": "user", "parts": [{"text": build_analysis_prompt(batch, city)}]}],
+            "config": generation_config(batch)
+        }
+        for batch in batches
+    ]
+    
+    try:
+        job = await run_gemini(
+            client.batches.create,
+            model=CONFIG["gemini_model"],
+            src=requests,
+            config={"display_name": f"explorer-{city}"}
+        )
+        logger(f"🗂️ Explorer: Submitted batch job {job.name}")
         
-        response_text = response.text
-        result = extract_json(response_text)
-        
-        events_count = len(result.get("valid_events", []))
-        logger(f"✅ Batch {batch_num}/{total_batches}: Found {events_count} valid events")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CONFIG["batch_timeout"]
+        while job.state.name not in BATCH_JOB_DONE_STATES:
+            if loop.time() > deadline:
+                await run_gemini(client.batches.cancel, name=job.name)
+                raise TimeoutError(f"Batch job {job.name} still {job.state.name} after {CONFIG['batch_timeout']}s")
+            await asyncio.sleep(CONFIG["batch_poll_interval"])
+            job = await run_gemini(client.batches.get, name=job.name)
         
-        return {
-            "success": True,
-            "events": result.get("valid_events", []),
-            "rejected": result.get("rejected_links", []),
-            "analyzed": result.get("analyzed_links", len(links))
-        }
+        logger(f"🗂️ Explorer: Batch job finished with {job.state.name}")
+        responses = (job.dest.inlined_responses if job.dest else None) or []
     except Exception as e:
-        logger(f"❌ Batch {batch_num}/{total_batches}: Failed - {e}")
-        return {
-            "success": False,
-            "events": [],
-            "rejected": [{"url": link["url"], "reason": str(e)} for link in links],
-            "error": str(e)
-        }
+        return [failed_batch(batch, e, i + 1, total, logger) for i, batch in enumerate(batches)]
+    
+    # Inlined responses come back in request order
+    results = []
+    for i, batch in enumerate(batches):
+        try:
+            if i >= len(responses):
+                raise ValueError(f"No response from batch job ({job.state.name})")
+            inlined = responses[i]
+            if inlined.error:
+                raise ValueError(inlined.error.message or "Batch request failed")
+            results.append(parse_batch_response(batch, inlined.response.text, i + 1, total, logger))
+        except Exception as e:
+            results.append(failed_batch(batch, e, i + 1, total, logger))
+    return results
+
+
+def batch_cache_entries(
+    city: str,
+    links: List[Dict[str, Any]],
+    events: List[Dict[str, Any]]
+) -> List[Tuple[Tuple[str, str], List[Dict[str, Any]]]]:
+    """EVENT_CACHE entries for a batch's events per source URL (links without events cache as empty)."""
+    by_url: Dict[str, List[Dict[str, Any]]] = {link.get("url"): [] for link in links}
+    for event in events:
+        url = (event.get("source") or {}).get("url")
+        if url not in by_url:
+            # Can't attribute this event to a link; caching would lose it
+            return []
+        by_url[url].append(event)
+    
+    return [((city, url), url_events) for url, url_events in by_url.items()]
+
+
+async def analyze_links(
+    links: List[Dict[str, Any]],
+    city: str,
+    logger: Callable[[str], None] = print,
+    bound: Optional[asyncio.Semaphore] = None
+) -> Dict[str, Any]:
+    """Extract raw events from links (cached per URL, then in batches).
+    
+    Events are not yet deduplicated or filtered; see select_in_person_events.
+    Pass the same `bound` to every call for one request so together they stay
+    within max_concurrent_batches.
+    """
+    # Reuse events already extracted from the same URLs
+    cached_events = []  # lists of events, one per cached URL
+    pending_links = []
+    cached = await EVENT_CACHE.get_many([(city, link.get("url")) for link in links])
+    for link, events in zip(links, cached):
+        if events is None:
+            pending_links.append(link)
+        else:
+            cached_events.append(events)
+    
+    if len(pending_links) < len(links):
+        logger(f"♻️ Explorer: {len(links) - len(pending_links)} links served from cache")
+    
+    # Create batches, keeping thin-snippet links together so only their
+    # batches pay for Google Search grounding
+    grounded_links = [link for link in pending_links if needs_grounding(link)]
+    if grounded_links:
+        logger(f"🔎 Explorer: {len(grounded_links)} links with thin snippets will use search grounding")
+    batches = []
+    for group in ([link for link in pending_links if not needs_grounding(link)], grounded_links):
+        for i in range(0, len(group), CONFIG["batch_size"]):
+            batches.append(group[i:i + CONFIG["batch_size"]])
+    
+    import time
+    start_time = time.time()
+    
+    if CONFIG["mode"] == "batch" and batches:
+        logger(f"📦 Explorer: Processing {len(batches)} batches as one Batch Mode job")
+        results = await analyze_batches_offline(batches, city, logger)
+    else:
+        if bound is None:
+            bound = asyncio.Semaphore(CONFIG["max_concurrent_batches"])
+        max_concurrent = min(CONFIG["max_concurrent_batches"], BATCH_LIMITER.limit)
+        logger(f"📦 Explorer: Processing {len(batches)} batches ({max_concurrent} concurrent)")
+        
+        # Create tasks for parallel execution
+        tasks = [
+            analyze_batch(batch, city, i + 1, len(batches), logger)
+            for i, batch in enumerate(batches)
+        ]
+        
+        # Execute batches in parallel with concurrency limit
+        results = await BATCH_LIMITER.gather(tasks, bound)
+    
+    duration = round(time.time() - start_time, 1)
+    
+    logger(f"⏱️ All batches completed in {duration}s")
+    
+    # Collect results
+    succeeded = [result for result in results if result["success"]]
+    await EVENT_CACHE.set_many(list(chain.from_iterable(
+        batch_cache_entries(city, batch, result["events"])
+        for batch, result in zip(batches, results) if result["success"]
+    )))
+    
+    return {
+        "events": list(chain(
+            chain.from_iterable(cached_events),
+            chain.from_iterable(result["events"] for result in succeeded)
+        )),
+        "rejected": list(chain.from_iterable(result["rejected"] for result in results)),
+        "analyzed": len(links) - len(pending_links) + sum(result["analyzed"] for result in succeeded)
+    }
 
 
-async def run_with_concurrency(tasks: List, limit: int) -> List:
-    """Run async tasks with concurrency limit."""
-    semaphore = asyncio.Semaphore(limit)
+def select_in_person_events(
+    events: Iterable[Dict[str, Any]],
+    logger: Callable[[str], None] = print
+) -> List[Dict[str, Any]]:
+    """Deduplicate, drop online events and sort by start time in a single pass."""
+    in_person_events = []
+    seen = set()
     
-    async def run_task(task):
-        async with semaphore:
-            return await task
+    for event in events:
+        key = (event.get("name"), event.get("start_time"))
+        if key in seen:
+            continue
+        seen.add(key)
+        if is_online_event(event):
+            logger(f"🚫 Filtered online event: {event.get('name')}")
+        else:
+            in_person_events.append(event)
     
-    return await asyncio.gather(*[run_task(t) for t in tasks], return_exceptions=True)
+    in_person_events.sort(key=start_time_key)
+    return in_person_events
 
 
 async def explore_links(
@@ -230,74 +618,23 @@ async def explore_links(
             "rejected": []
         }
     
-    # Create batches
-    batches = []
-    for i in range(0, len(links), CONFIG["batch_size"]):
-        batches.append(links[i:i + CONFIG["batch_size"]])
-    
-    logger(f"📦 Explorer: Processing {len(batches)} batches ({CONFIG['max_concurrent_batches']} concurrent)")
-    
-    # Create tasks for parallel execution
-    tasks = [
-        analyze_batch(batch, city, i + 1, len(batches), logger)
-        for i, batch in enumerate(batches)
-    ]
-    
-    # Execute batches in parallel with concurrency limit
     import time
     start_time = time.time()
-    results = await run_with_concurrency(tasks, CONFIG["max_concurrent_batches"])
+    analysis = await analyze_links(links, city, logger)
+    in_person_events = select_in_person_events(analysis["events"], logger)
     duration = round(time.time() - start_time, 1)
     
-    logger(f"⏱️ All batches completed in {duration}s")
-    
-    # Collect results
-    all_events = []
-    all_rejected = []
-    total_analyzed = 0
-    
-    for result in results:
-        if result["success"]:
-            all_events.extend(result["events"])
-            all_rejected.extend(result["rejected"])
-            total_analyzed += result["analyzed"]
-        else:
-            all_rejected.extend(result["rejected"])
-    
-    # Deduplicate events
-    unique_events = []
-    seen = set()
-    
-    for event in all_events:
-        key = f"{event.get('name')}-{event.get('start_time')}"
-        if key not in seen:
-            seen.add(key)
-            unique_events.append(event)
-    
-    # Sort by start_time
-    unique_events.sort(
-        key=lambda e: e.get("start_time", "2099-01-01T00:00:00")
-    )
-    
-    # Filter out online events
-    in_person_events = []
-    for event in unique_events:
-        if is_online_event(event):
-            logger(f"🚫 Filtered online event: {event.get('name')}")
-        else:
-            in_person_events.append(event)
-    
     logger(f"\n✅ Explorer: Completed in {duration}s!")
-    logger(f"📊 Total links analyzed: {total_analyzed}")
+    logger(f"📊 Total links analyzed: {analysis['analyzed']}")
     logger(f"🎯 Valid in-person events: {len(in_person_events)}")
-    logger(f"❌ Rejected: {len(all_rejected)}")
+    logger(f"❌ Rejected: {len(analysis['rejected'])}")
     
     return {
         "success": True,
         "events": in_person_events,
-        "total_analyzed": total_analyzed,
+        "total_analyzed": analysis["analyzed"],
         "total_events": len(in_person_events),
-        "rejected": all_rejected
+        "rejected": analysis["rejected"]
     }
 
 
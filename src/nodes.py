@@ -1,58 +1,107 @@
-import json
 import asyncio
+import json
 from datetime import datetime
+from itertools import chain
 from typing import Dict, Any
 
+from langgraph.config import get_stream_writer
+
 from state import ItineraryState
-from scout import scout_events
-from explorer import explore_links
-from planner import analyze_event_coverage, sort_by_time
+from scout import links_from_result, scout_event_stream
+from explorer import CONFIG as EXPLORER_CONFIG, analyze_links, explore_links, select_in_person_events
+from planner import analyze_event_coverage, project_times, sort_by_time
+from cache import TTLCache
 
-async def scout_node(state: ItineraryState) -> Dict[str, Any]:
+# Scout link-sets keyed by (city, interests, date range)
+SCOUT_CACHE = TTLCache(max_entries=256, ttl=3600)
+
+async def scout_explore_node(state: ItineraryState) -> Dict[str, Any]:
     """
-    Scout Node: Finds event links based on interests.
+    Scout + Explorer Node: Finds event links and analyzes them into valid events.
+    
+    Explorer starts on each full batch of links as soon as searches yield it,
+    instead of waiting for the slowest Scout search.
     """
     city = state["city"]
     interests = state["interests"]
     start_date = state["start_date"]
     end_date = state["end_date"]
+    writer = get_stream_writer()
     
-    def log_func(msg: str):
+    def scout_log(msg: str):
         print(f"[Scout] {msg}")
     
-    log_func(f"Starting scout for {city} with interests: {interests}")
+    def explorer_log(msg: str):
+        print(f"[Explorer] {msg}")
     
-    # Shield from cancellation so Gemini calls complete even if client disconnects
-    results = await asyncio.shield(
-        scout_events(city, interests, start_date, end_date, log_func)
-    )
+    cache_key = ("scout", city, tuple(sorted(interests)), start_date, end_date)
+    cached_links = SCOUT_CACHE.get(cache_key)
+    if cached_links is not None:
+        scout_log(f"Serving {len(cached_links)} cached links for {city}")
+        writer({"phase": "scout_complete", "links": len(cached_links), "cache_hit": True})
+        explorer_log(f"Starting explorer with {len(cached_links)} links")
+        results = await explore_links(cached_links, city, explorer_log)
+        return {
+            "scout_links": cached_links,
+            "explorer_events": results.get("events", []),
+            "cache_hit": True,
+            "logs": [
+                f"Scout served {len(cached_links)} links from cache",
+                f"Explorer found {results.get('total_events', 0)} valid events"
+            ]
+        }
     
-    return {
-        "scout_links": results.get("all_links", []),
-        "logs": [f"Scout found {results.get('total_links_found', 0)} links"]
-    }
-
-
-async def explorer_node(state: ItineraryState) -> Dict[str, Any]:
-    """
-    Explorer Node: Analyzes links to find valid events.
-    """
-    links = state.get("scout_links", [])
-    city = state["city"]
+    scout_log(f"Starting scout for {city} with interests: {interests}")
     
-    def log_func(msg: str):
-        print(f"[Explorer] {msg}")
+    links = []
+    seen_urls = set()
+    complete = True
+    
+    # New links are buffered across searches and handed to Explorer in full
+    # batches, so streaming doesn't turn into many small, part-empty calls
+    batch_size = EXPLORER_CONFIG["batch_size"]
+    buffered = []
+    # Shared by every batch of this request, under Explorer's global limit
+    bound = asyncio.Semaphore(EXPLORER_CONFIG["max_concurrent_batches"])
+    
+    async with asyncio.TaskGroup() as tg:
+        analyses = []
+        async for result in scout_event_stream(city, interests, start_date, end_date, scout_log):
+            complete = complete and result.get("success", False)
+            for link in links_from_result(result, start_date):
+                if link["url"] not in seen_urls:
+                    seen_urls.add(link["url"])
+                    links.append(link)
+                    buffered.append(link)
+            while len(buffered) >= batch_size:
+                batch, buffered = buffered[:batch_size], buffered[batch_size:]
+                analyses.append(tg.create_task(analyze_links(batch, city, explorer_log, bound)))
         
-    log_func(f"Starting explorer with {len(links)} links")
+        # Remainder once every search has finished
+        if buffered:
+            analyses.append(tg.create_task(analyze_links(buffered, city, explorer_log, bound)))
+        
+        scout_log(f"Scout: Completed! Found {len(links)} unique links")
+        writer({"phase": "scout_complete", "links": len(links), "cache_hit": False})
+    
+    # Only cache complete results so a transient search failure is retried
+    if links and complete:
+        SCOUT_CACHE.set(cache_key, links)
     
-    # Shield from cancellation so Gemini calls complete even if client disconnects
-    results = await asyncio.shield(
-        explore_links(links, city, log_func)
+    events = select_in_person_events(
+        chain.from_iterable(task.result()["events"] for task in analyses),
+        explorer_log
     )
+    explorer_log(f"Explorer: Found {len(events)} valid in-person events")
     
     return {
-        "explorer_events": results.get("events", []),
-        "logs": [f"Explorer found {results.get('total_events', 0)} valid events"]
+        "scout_links": links,
+        "explorer_events": events,
+        "cache_hit": False,
+        "logs": [
+            f"Scout found {len(links)} links",
+            f"Explorer found {len(events)} valid events"
+        ]
     }
 
 
@@ -67,8 +116,9 @@ async def planner_node(state: ItineraryState) -> Dict[str, Any]:
     # Sort events
     sorted_events = sort_by_time(events)
     
-    # Analyze coverage
-    coverage = analyze_event_coverage(sorted_events, start_date, end_date)
+    # Analyze coverage (start times parsed once, shared by planner passes)
+    times = project_times(sorted_events)
+    coverage = analyze_event_coverage(sorted_events, start_date, end_date, times)
     
     return {
         "itinerary": sorted_events,
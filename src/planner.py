@@ -3,28 +3,67 @@ Planner Module - Event Organization Utilities
 Provides helper functions for sorting, grouping, and optimizing itineraries
 """
 
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, NamedTuple, Optional
+from datetime import date as _date, datetime, timezone
+
+
+# Events without a start_time sort after everything else
+NO_START_TIME = "2099-01-01T00:00:00"
+
+
+def start_time_key(event: Dict[str, Any]) -> str:
+    """ISO start_time sort key; also covers a start_time that is present but null."""
+    return event.get("start_time") or NO_START_TIME
+
+
+class EventTimes(NamedTuple):
+    """Start date and hour of each event, index-aligned with the event list."""
+    dates: List[Optional[str]]
+    hours: List[Optional[int]]
+
+
+def project_times(events: List[Dict[str, Any]]) -> EventTimes:
+    """Parse every start_time once so several planner passes can share the result.
+    
+    Events without a start_time get None for both; an unreadable hour is None.
+    """
+    dates: List[Optional[str]] = []
+    hours: List[Optional[int]] = []
+    for event in events:
+        start_time = event.get("start_time")
+        if not start_time:
+            dates.append(None)
+            hours.append(None)
+            continue
+        dates.append(start_time.split("T")[0])
+        try:
+            hours.append(int(start_time[11:13]))
+        except ValueError:
+            hours.append(None)
+    return EventTimes(dates, hours)
 
 
 def sort_by_time(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Sort events chronologically by start_time."""
-    return sorted(
-        events,
-        key=lambda e: datetime.fromisoformat(e.get("start_time", "2099-01-01T00:00:00"))
-    )
+    """Sort events chronologically by start_time.
+    
+    ISO 8601 timestamps in one format order lexicographically, so the raw
+    strings are compared without parsing them.
+    """
+    return sorted(events, key=start_time_key)
 
 
-def group_by_date(events: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+def group_by_date(
+    events: List[Dict[str, Any]],
+    times: Optional[EventTimes] = None
+) -> Dict[str, List[Dict[str, Any]]]:
     """Group events by date."""
+    if times is None:
+        times = project_times(events)
     grouped: Dict[str, List[Dict[str, Any]]] = {}
     
-    for event in events:
-        if event.get("start_time"):
-            date = event["start_time"].split("T")[0]
-            if date not in grouped:
-                grouped[date] = []
-            grouped[date].append(event)
+    for date, event in zip(times.dates, events):
+        if date is not None:
+            grouped.setdefault(date, []).append(event)
     
     return grouped
 
@@ -61,17 +100,31 @@ def filter_by_date_range(
     start_date: str, 
     end_date: str
 ) -> List[Dict[str, Any]]:
-    """Filter events by date range."""
-    start = datetime.fromisoformat(start_date)
-    end = datetime.fromisoformat(f"{end_date}T23:59:59")
+    """Filter events by date range (string comparison on ISO timestamps)."""
+    end = f"{end_date}T23:59:59"
     
     return [
         event for event in events
         if event.get("start_time") and 
-           start <= datetime.fromisoformat(event["start_time"]) <= end
+           start_date <= event["start_time"] <= end
     ]
 
 
+def _iso_to_seconds(iso: str) -> float:
+    """Seconds since 0001-01-01 for an ISO datetime string.
+    
+    Upstream times are naive "YYYY-MM-DDTHH:MM:SS", read by slicing; anything
+    else (fractions, offsets) goes through datetime.fromisoformat.
+    """
+    if len(iso) == 19 and iso[10] == "T":
+        day = _date(int(iso[0:4]), int(iso[5:7]), int(iso[8:10])).toordinal()
+        return day * 86400 + int(iso[11:13]) * 3600 + int(iso[14:16]) * 60 + int(iso[17:19])
+    dt = datetime.fromisoformat(iso)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.toordinal() * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second + dt.microsecond / 1e6
+
+
 def find_schedule_gaps(day_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Analyze schedule gaps for a single day."""
     if len(day_events) < 2:
@@ -81,9 +134,9 @@ def find_schedule_gaps(day_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     sorted_events = sort_by_time(day_events)
     
     for i in range(len(sorted_events) - 1):
-        current_end = datetime.fromisoformat(sorted_events[i]["end_time"])
-        next_start = datetime.fromisoformat(sorted_events[i + 1]["start_time"])
-        gap_minutes = (next_start - current_end).total_seconds() / 60
+        current_end = _iso_to_seconds(sorted_events[i]["end_time"])
+        next_start = _iso_to_seconds(sorted_events[i + 1]["start_time"])
+        gap_minutes = (next_start - current_end) / 60
         
         if gap_minutes > 60:  # Gap > 1 hour
             gaps.append({
@@ -97,8 +150,13 @@ def find_schedule_gaps(day_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     return gaps
 
 
-def get_time_distribution(events: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+def get_time_distribution(
+    events: List[Dict[str, Any]],
+    times: Optional[EventTimes] = None
+) -> Dict[str, List[Dict[str, Any]]]:
     """Get time-of-day distribution for events."""
+    if times is None:
+        times = project_times(events)
     distribution = {
         "morning": [],    # 6am - 12pm
         "afternoon": [],  # 12pm - 5pm
@@ -106,12 +164,10 @@ def get_time_distribution(events: List[Dict[str, Any]]) -> Dict[str, List[Dict[s
         "night": []       # 9pm - 6am
     }
     
-    for event in events:
-        if not event.get("start_time"):
+    for hour, event in zip(times.hours, events):
+        if hour is None:
             continue
         
-        hour = int(event["start_time"].split("T")[1].split(":")[0])
-        
         if 6 <= hour < 12:
             distribution["morning"].append(event)
         elif 12 <= hour < 17:
@@ -151,46 +207,46 @@ def format_itinerary(events: List[Dict[str, Any]]) -> str:
     return output
 
 
-def analyze_event_coverage(events: List[Dict[str, Any]], start_date: str, end_date: str) -> Dict[str, Any]:
+def analyze_event_coverage(
+    events: List[Dict[str, Any]],
+    start_date: str,
+    end_date: str,
+    times: Optional[EventTimes] = None
+) -> Dict[str, Any]:
     """Ensure minimum events per day coverage."""
-    grouped: Dict[str, List[Dict[str, Any]]] = {}
-    
-    # Initialize all dates
-    from datetime import timedelta
-    current = datetime.fromisoformat(start_date)
-    end = datetime.fromisoformat(end_date)
-    
-    while current <= end:
-        date_str = current.strftime("%Y-%m-%d")
-        grouped[date_str] = []
-        current += timedelta(days=1)
+    if times is None:
+        times = project_times(events)
+    first_day = datetime.fromisoformat(start_date).toordinal()
+    last_day = datetime.fromisoformat(end_date).toordinal()
+    
+    # Initialize all dates (day ordinals avoid per-day timedelta arithmetic)
+    coverage: Dict[str, Dict[str, Any]] = {
+        datetime.fromordinal(ordinal).strftime("%Y-%m-%d"): {
+            "count": 0,
+            "events": [],
+            "has_morning": False,
+            "has_afternoon": False,
+            "has_evening": False
+        }
+        for ordinal in range(first_day, last_day + 1)
+    }
     
-    # Group events by date
-    for event in events:
-        if event.get("start_time"):
-            event_date = event["start_time"].split("T")[0]
-            if event_date in grouped:
-                grouped[event_date].append(event)
-    
-    # Calculate coverage
-    coverage = {}
-    for date, day_events in grouped.items():
-        def has_time_slot(events: List[Dict], start_hour: int, end_hour: int) -> bool:
-            for e in events:
-                try:
-                    hour = int(e["start_time"].split("T")[1].split(":")[0])
-                    if start_hour <= hour < end_hour:
-                        return True
-                except (KeyError, IndexError, ValueError):
-                    pass
-            return False
+    # Group events and mark time slots in a single pass
+    for date, hour, event in zip(times.dates, times.hours, events):
+        day = coverage.get(date)
+        if day is None:
+            continue
         
-        coverage[date] = {
-            "count": len(day_events),
-            "events": day_events,
-            "has_morning": has_time_slot(day_events, 8, 12),
-            "has_afternoon": has_time_slot(day_events, 12, 17),
-            "has_evening": has_time_slot(day_events, 17, 24)
-        }
+        day["count"] += 1
+        day["events"].append(event)
+        
+        if hour is None:
+            continue
+        if 8 <= hour < 12:
+            day["has_morning"] = True
+        elif 12 <= hour < 17:
+            day["has_afternoon"] = True
+        elif 17 <= hour < 24:
+            day["has_evening"] = True
     
     return coverage
@@ -4,21 +4,45 @@ Uses parallel searches for each interest to dramatically reduce search time
 """
 
 import os
-import json
 import asyncio
 import re
 from datetime import datetime
-from typing import List, Dict, Any, Callable, Optional
+from functools import lru_cache
+from itertools import chain
+from typing import AsyncIterator, List, Dict, Any, Callable, Optional
 
+import orjson
 from google import genai
+from google.genai import errors
+
+from cache import DiskCache
+from concurrency import AdaptiveLimiter, is_rate_limited, run_gemini
 
 CONFIG = {
     "google_api_key": os.getenv("GOOGLE_API_KEY"),
     "gemini_model": os.getenv("GEMINI_MODEL", "gemini-2.0-flash"),
     "links_per_search": 15,
-    "max_concurrent_searches": 4,
+    # Flex tier is half price with a larger, sheddable quota, so more
+    # searches can run at once; shed requests are retried on Standard
+    "service_tier": os.getenv("SCOUT_SERVICE_TIER", "flex"),
+    # Per request; all requests in the process share max_global_searches,
+    # which adapts downward when Gemini throttles
+    "max_concurrent_searches": 16,
+    "max_global_searches": int(os.getenv("SCOUT_MAX_GLOBAL_SEARCHES", "48")),
+    "interests_per_search": 3,
 }
 
+# Status codes Gemini uses when a request is throttled or shed (429/503), or
+# rejected as an invalid argument, e.g. a tier the model doesn't offer (400)
+RETRY_STANDARD_CODES = frozenset({400, 429, 503})
+
+# Searches adapt their process-wide concurrency to Gemini's rate limiting
+SEARCH_LIMITER = AdaptiveLimiter(CONFIG["max_global_searches"])
+
+# Successful search results per (interest, city, start_date, end_date);
+# on disk so reruns and other workers skip identical searches
+SEARCH_CACHE = DiskCache("scout", ttl=3600)
+
 # Gemini client (lazy init)
 _client: Optional[genai.Client] = None
 
@@ -33,15 +57,8 @@ def get_client() -> genai.Client:
     return _client
 
 
-def build_search_prompt(interest: str, city: str, start_date: str, end_date: str) -> str:
-    """Build the prompt for Gemini to search and extract links."""
-    start_obj = datetime.fromisoformat(start_date)
-    end_obj = datetime.fromisoformat(end_date)
-    
-    formatted_start = start_obj.strftime("%B %d, %Y")
-    formatted_end = end_obj.strftime("%B %d, %Y")
-    
-    return f"""You are an Event Link Scout. Search the web and find URLs to event pages.
+# Prompt templates are built once; each call only fills in the dynamic slots
+SEARCH_PROMPT_TEMPLATE = """You are an Event Link Scout. Search the web and find URLs to event pages.
 
 ## TASK:
 Find "{interest}" events in {city} between {formatted_start} and {formatted_end}.
@@ -55,7 +72,7 @@ Search these platforms for "{interest}" events in {city}:
 - Facebook Events
 
 ## REQUIREMENTS:
-1. Find up to {CONFIG['links_per_search']} unique event links
+1. Find up to {links_per_search} unique event links
 2. Only actual event pages (not homepages or search results)
 3. Events must be within the date range
 4. Include snippet showing why link is relevant
@@ -79,6 +96,84 @@ Search these platforms for "{interest}" events in {city}:
 
 CRITICAL: Output ONLY valid JSON. Start with {{ end with }}"""
 
+MULTI_SEARCH_PROMPT_TEMPLATE = """You are an Event Link Scout. Search the web and find URLs to event pages.
+
+## TASK:
+For EACH interest below, find events in {city} between {formatted_start} and {formatted_end}.
+{interest_list}
+
+## SEARCH STRATEGY:
+Search these platforms for each interest's events in {city}:
+- Eventbrite
+- Meetup  
+- Luma (lu.ma)
+- Local venue calendars
+- Facebook Events
+
+## REQUIREMENTS:
+1. Find up to {links_per_search} unique event links PER INTEREST
+2. Only actual event pages (not homepages or search results)
+3. Events must be within the date range
+4. Include snippet showing why link is relevant
+
+## OUTPUT FORMAT (JSON only):
+{{
+  "city": "{city}",
+  "date_range": "{start_date} to {end_date}",
+  "results": [
+    {{
+      "interest": "exact interest text from the list above",
+      "links": [
+        {{
+          "url": "https://event-page-url.com",
+          "title": "Event title",
+          "snippet": "Brief description",
+          "platform": "Eventbrite/Meetup/Luma/Other",
+          "event_date": "YYYY-MM-DD if known"
+        }}
+      ]
+    }}
+  ]
+}}
+
+CRITICAL: Output ONLY valid JSON with one "results" entry per interest. Start with {{ end with }}"""
+
+
+@lru_cache(maxsize=256)
+def format_prompt_date(iso_date: str) -> str:
+    """"2026-01-03" -> "January 03, 2026"."""
+    return datetime.fromisoformat(iso_date).strftime("%B %d, %Y")
+
+
+def build_search_prompt(interest: str, city: str, start_date: str, end_date: str) -> str:
+    """Build the prompt for Gemini to search and extract links."""
+    return SEARCH_PROMPT_TEMPLATE.format(
+        interest=interest,
+        city=city,
+        start_date=start_date,
+        end_date=end_date,
+        formatted_start=format_prompt_date(start_date),
+        formatted_end=format_prompt_date(end_date),
+        links_per_search=CONFIG["links_per_search"]
+    )
+
+
+def build_multi_search_prompt(interests: List[str], city: str, start_date: str, end_date: str) -> str:
+    """Build one prompt that searches for several interests at once."""
+    return MULTI_SEARCH_PROMPT_TEMPLATE.format(
+        interest_list="\n".join(f'- "{interest}"' for interest in interests),
+        city=city,
+        start_date=start_date,
+        end_date=end_date,
+        formatted_start=format_prompt_date(start_date),
+        formatted_end=format_prompt_date(end_date),
+        links_per_search=CONFIG["links_per_search"]
+    )
+
+
+JSON_CODE_BLOCK_RE = re.compile(r'```json\s*([\s\S]*?)\s*```', re.IGNORECASE)
+JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
+
 
 def extract_json(text: str) -> Dict[str, Any]:
     """Extract JSON from response."""
@@ -87,29 +182,57 @@ def extract_json(text: str) -> Dict[str, Any]:
     
     # Try direct parse
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         pass
     
     # Try code block
-    code_match = re.search(r'```json\s*([\s\S]*?)\s*```', text, re.IGNORECASE)
+    code_match = JSON_CODE_BLOCK_RE.search(text)
     if code_match:
         try:
-            return json.loads(code_match.group(1).strip())
-        except json.JSONDecodeError:
+            return orjson.loads(code_match.group(1).strip())
+        except orjson.JSONDecodeError:
             pass
     
     # Try to find JSON object
-    json_match = re.search(r'\{[\s\S]*\}', text)
+    json_match = JSON_OBJECT_RE.search(text)
     if json_match:
         try:
-            return json.loads(json_match.group(0))
-        except json.JSONDecodeError:
+            return orjson.loads(json_match.group(0))
+        except orjson.JSONDecodeError:
             pass
     
     raise ValueError("Could not extract JSON from Scout response")
 
 
+async def generate_search(client: genai.Client, prompt: str, max_output_tokens: int = 4096):
+    """Run a search on the configured service tier, retrying once on Standard if shed or rejected."""
+    config = {
+        "tools": [{"google_search": {}}],
+        "temperature": 0.2,
+        "max_output_tokens": max_output_tokens,
+    }
+    tier = CONFIG["service_tier"]
+    if tier and tier != "standard":
+        try:
+            return await run_gemini(
+                client.models.generate_content,
+                model=CONFIG["gemini_model"],
+                contents=prompt,
+                config={**config, "service_tier": tier}
+            )
+        except errors.APIError as e:
+            if e.code not in RETRY_STANDARD_CODES:
+                raise
+    
+    return await run_gemini(
+        client.models.generate_content,
+        model=CONFIG["gemini_model"],
+        contents=prompt,
+        config=config
+    )
+
+
 async def search_for_interest(
     interest: str,
     city: str,
@@ -124,16 +247,8 @@ async def search_for_interest(
     logger(f'🔍 Scout: Searching "{interest}" events in {city}')
     
     try:
-        response = await asyncio.to_thread(
-            client.models.generate_content,
-            model=CONFIG["gemini_model"],
-            contents=prompt,
-            config={
-                "tools": [{"google_search": {}}],
-                "temperature": 0.2,
-                "max_output_tokens": 4096,
-            }
-        )
+        response = await generate_search(client, prompt)
+        SEARCH_LIMITER.on_success()
         
         response_text = response.text
         result = extract_json(response_text)
@@ -150,6 +265,8 @@ async def search_for_interest(
             "links": result.get("links", [])
         }
     except Exception as e:
+        if is_rate_limited(e):
+            SEARCH_LIMITER.on_throttle()
         logger(f'❌ Scout: Error searching "{interest}": {e}')
         return {
             "success": False,
@@ -160,15 +277,169 @@ async def search_for_interest(
         }
 
 
-async def run_with_concurrency(tasks: List, limit: int) -> List:
-    """Run async tasks with concurrency limit."""
-    semaphore = asyncio.Semaphore(limit)
+async def search_for_interests(
+    interests: List[str],
+    city: str,
+    start_date: str,
+    end_date: str,
+    logger: Callable[[str], None]
+) -> List[Dict[str, Any]]:
+    """Search for interests, serving recent results from the disk cache."""
+    results: Dict[str, Dict[str, Any]] = {}
+    cached_results = await SEARCH_CACHE.get_many(
+        [(interest, city, start_date, end_date) for interest in interests]
+    )
+    for interest, cached in zip(interests, cached_results):
+        if cached is not None:
+            logger(f'♻️ Scout: Serving {len(cached["links"])} cached links for "{interest}"')
+            results[interest] = cached
+    
+    missing = [interest for interest in interests if interest not in results]
+    if missing:
+        searched = await search_interest_group(missing, city, start_date, end_date, logger)
+        await SEARCH_CACHE.set_many([
+            ((result["interest"], city, start_date, end_date), result)
+            for result in searched if result["success"]
+        ])
+        for result in searched:
+            results[result["interest"]] = result
+    return [results[interest] for interest in interests]
+
+
+async def search_interest_group(
+    interests: List[str],
+    city: str,
+    start_date: str,
+    end_date: str,
+    logger: Callable[[str], None]
+) -> List[Dict[str, Any]]:
+    """Search for several interests with one Gemini call; one result per interest."""
+    if len(interests) == 1:
+        return [await search_for_interest(interests[0], city, start_date, end_date, logger)]
+    
+    client = get_client()
+    prompt = build_multi_search_prompt(interests, city, start_date, end_date)
+    
+    quoted = ", ".join(f'"{interest}"' for interest in interests)
+    logger(f"🔍 Scout: Searching {quoted} events in {city}")
+    
+    try:
+        response = await generate_search(client, prompt, max_output_tokens=8192)
+        SEARCH_LIMITER.on_success()
+        result = extract_json(response.text)
+    except Exception as e:
+        if is_rate_limited(e):
+            SEARCH_LIMITER.on_throttle()
+        logger(f'❌ Scout: Error searching {", ".join(interests)}: {e}')
+        return [
+            {
+                "success": False,
+                "interest": interest,
+                "city": city,
+                "links": [],
+                "error": str(e)
+            }
+            for interest in interests
+        ]
     
-    async def run_task(task):
-        async with semaphore:
-            return await task
+    # Attribute links back to the requested interest spelling
+    entries = result.get("results") or []
+    requested = {i.casefold() for i in interests}
+    links_by_interest: Dict[str, List[Dict[str, Any]]] = {}
+    unclaimed = []
+    for entry in entries:
+        key = str(entry.get("interest", "")).casefold()
+        if key in requested:
+            links_by_interest.setdefault(key, []).extend(entry.get("links") or [])
+        else:
+            unclaimed.append(entry)
     
-    return await asyncio.gather(*[run_task(t) for t in tasks], return_exceptions=True)
+    # The model sometimes paraphrases a label ("Tech Event" for "tech events").
+    # If it answered once per interest, the unmatched entries line up with the
+    # unmatched interests by position.
+    missing = [i for i in dict.fromkeys(interests) if i.casefold() not in links_by_interest]
+    if missing and len(entries) == len(interests) and len(unclaimed) == len(missing):
+        for interest, entry in zip(missing, unclaimed):
+            links_by_interest[interest.casefold()] = entry.get("links") or []
+        missing = []
+    
+    # Otherwise search the unattributed interests on their own, so they are
+    # neither reported empty nor cached as a successful empty result
+    retried: Dict[str, Dict[str, Any]] = {}
+    if missing:
+        logger(f"⚠️ Scout: No results labelled for {', '.join(missing)}; searching separately")
+        for retry in await asyncio.gather(*(
+            search_for_interest(interest, city, start_date, end_date, logger)
+            for interest in missing
+        )):
+            retried[retry["interest"]] = retry
+    
+    results = []
+    for interest in interests:
+        if interest in retried:
+            results.append(retried[interest])
+            continue
+        links = links_by_interest[interest.casefold()]
+        logger(f'✅ Scout: Found {len(links)} links for "{interest}"')
+        results.append({
+            "success": True,
+            "interest": interest,
+            "city": city,
+            "start_date": start_date,
+            "end_date": end_date,
+            "links": links
+        })
+    return results
+
+
+def group_interests(interests: List[str]) -> List[List[str]]:
+    """Split interests into the groups searched together in one Gemini call."""
+    size = CONFIG["interests_per_search"]
+    return [interests[i:i + size] for i in range(0, len(interests), size)]
+
+
+def links_from_result(result: Dict[str, Any], start_date: str) -> List[Dict[str, Any]]:
+    """Links from one interest's search, tagged with the interest and date."""
+    return [
+        {
+            **link,
+            "interest": result["interest"],
+            "date": link.get("event_date", start_date),
+            "searched_at": datetime.now().isoformat()
+        }
+        for link in result.get("links") or []
+    ]
+
+
+async def scout_event_stream(
+    city: str,
+    interests: List[str],
+    start_date: str,
+    end_date: str,
+    logger: Callable[[str], None] = print
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield each interest's search result as soon as its search finishes.
+    
+    Lets callers start analyzing links while slower searches are still running.
+    """
+    groups = group_interests(interests)
+    max_concurrent = min(CONFIG["max_concurrent_searches"], SEARCH_LIMITER.limit)
+    logger(f"⚡ Streaming {len(groups)} searches for {len(interests)} interests (max {max_concurrent} concurrent)")
+    
+    bound = asyncio.Semaphore(CONFIG["max_concurrent_searches"])
+    tasks = [
+        asyncio.ensure_future(SEARCH_LIMITER.run(
+            search_for_interests(group, city, start_date, end_date, logger), bound
+        ))
+        for group in groups
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for result in await next_done:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 async def scout_events(
@@ -195,7 +466,9 @@ async def scout_events(
     logger(f"📍 City: {city}")
     logger(f"🎯 Interests: {', '.join(interests)}")
     logger(f"📅 Dates: {start_date} to {end_date}")
-    logger(f"⚡ Running {len(interests)} searches in parallel (max {CONFIG['max_concurrent_searches']} concurrent)")
+    # Interests are searched a few per Gemini call to share the prompt overhead
+    groups = group_interests(interests)
+    logger(f"⚡ Running {len(groups)} searches for {len(interests)} interests in parallel (max {min(CONFIG['max_concurrent_searches'], SEARCH_LIMITER.limit)} concurrent)")
     
     all_results = {
         "city": city,
@@ -209,29 +482,24 @@ async def scout_events(
     
     # Create tasks for parallel execution
     tasks = [
-        search_for_interest(interest, city, start_date, end_date, logger)
-        for interest in interests
+        search_for_interests(group, city, start_date, end_date, logger)
+        for group in groups
     ]
     
     # Execute all searches in parallel with concurrency limit
     import time
     start_time = time.time()
-    results = await run_with_concurrency(tasks, CONFIG["max_concurrent_searches"])
+    bound = asyncio.Semaphore(CONFIG["max_concurrent_searches"])
+    results = list(chain.from_iterable(await SEARCH_LIMITER.gather(tasks, bound)))
     duration = round(time.time() - start_time, 1)
     
     logger(f"⏱️ All searches completed in {duration}s")
     
     # Process results
-    for result in results:
-        all_results["search_results"].append(result)
-        if result.get("links"):
-            for link in result["links"]:
-                all_results["all_links"].append({
-                    **link,
-                    "interest": result["interest"],
-                    "date": link.get("event_date", start_date),
-                    "searched_at": datetime.now().isoformat()
-                })
+    all_results["search_results"] = results
+    all_results["all_links"] = list(chain.from_iterable(
+        links_from_result(result, start_date) for result in results
+    ))
     
     # Deduplicate links by URL
     unique_links = []
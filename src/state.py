@@ -18,4 +18,5 @@ class ItineraryState(TypedDict):
     coverage: Dict[str, Any]
     
     # Metadata/Logs
+    cache_hit: bool
     logs: Annotated[List[str], operator.add]
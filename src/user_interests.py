@@ -3,7 +3,10 @@ User Interests Configuration
 Backend module for interest categories and tags used in itinerary generation
 """
 
-from typing import List, Set, Dict
+import sys
+from functools import lru_cache
+from itertools import chain
+from typing import FrozenSet, Iterator, List, Dict, NamedTuple, Tuple
 
 # Interest categories with their associated tags
 INTEREST_CATEGORIES = [
@@ -80,81 +83,119 @@ INTEREST_CATEGORIES = [
 ]
 
 
+class Category(NamedTuple):
+    """Immutable category record with its tags pre-normalized for matching."""
+    name: str
+    tags: Tuple[str, ...]
+    tags_cf: FrozenSet[str]
+
+
+# Internal view of the static taxonomy. INTEREST_CATEGORIES stays the public,
+# JSON-shaped form served by the API. Casefolded tags are interned so the tag
+# set and inverted index share one string object per tag.
+_CATEGORIES: Tuple[Category, ...] = tuple(
+    Category(
+        category["name"],
+        tuple(category["tags"]),
+        frozenset(sys.intern(tag.casefold()) for tag in category["tags"])
+    )
+    for category in INTEREST_CATEGORIES
+)
+_CATEGORY_NAMES: Tuple[str, ...] = tuple(c.name for c in _CATEGORIES)
+
+# The sorted tag list is built once at import
+_ALL_TAGS: Tuple[str, ...] = tuple(sorted({tag for c in _CATEGORIES for tag in c.tags}))
+_ALL_TAGS_CF: FrozenSet[str] = frozenset().union(*(c.tags_cf for c in _CATEGORIES))
+
+# Inverted index: casefolded tag -> names of the categories listing it
+# (a tag such as "Networking" belongs to more than one category)
+_TAG_TO_CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    tag: tuple(c.name for c in _CATEGORIES if tag in c.tags_cf)
+    for tag in _ALL_TAGS_CF
+}
+
+# Specific event type keywords per category
+_EVENT_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    name: tuple(map(sys.intern, terms)) for name, terms in {
+        "Outdoor": ["outdoor events", "nature activities", "adventure tours"],
+        "Social Activities": ["social events", "networking events", "happy hours", "meetups"],
+        "Hobbies and Passion": ["hobby workshops", "craft classes", "creative events"],
+        "Sports and Fitness": ["fitness classes", "sports events", "workout sessions"],
+        "Health and Wellbeing": ["wellness events", "meditation sessions", "health workshops"],
+        "Technology": ["tech meetups", "hackathons", "startup events", "tech talks"],
+        "Art and Culture": ["art exhibitions", "cultural events", "museum exhibits", "performances"],
+        "Games": ["gaming events", "esports", "board game nights", "gaming tournaments"],
+        "Career and Business": ["business networking", "professional events", "industry conferences"],
+        "Science and Education": ["lectures", "educational workshops", "learning events"]
+    }.items()
+}
+
+# Search terms a matched category contributes: its name, then its keywords
+_CATEGORY_SEARCH_TERMS: Dict[str, Tuple[str, ...]] = {
+    name: (name, *_EVENT_KEYWORDS.get(name, ()))
+    for name in _CATEGORY_NAMES
+}
+
+
 def get_all_tags() -> List[str]:
     """Get all available tags as a flat array."""
-    all_tags: Set[str] = set()
-    for category in INTEREST_CATEGORIES:
-        for tag in category["tags"]:
-            all_tags.add(tag)
-    return sorted(list(all_tags))
+    return list(_ALL_TAGS)
 
 
 def get_category_names() -> List[str]:
     """Get category names."""
-    return [cat["name"] for cat in INTEREST_CATEGORIES]
+    return list(_CATEGORY_NAMES)
+
+
+def _interest_key(interests: List[str]) -> FrozenSet[str]:
+    """Canonical (casefolded), hashable form of an interest list for the memoized helpers."""
+    return frozenset(i.casefold() for i in interests)
 
 
 def find_categories_for_interests(interests: List[str]) -> List[str]:
     """Find which categories contain given interests."""
-    categories: Set[str] = set()
-    interests_lower = [i.lower() for i in interests]
-    
-    for category in INTEREST_CATEGORIES:
-        has_match = any(
-            tag.lower() in interests_lower 
-            for tag in category["tags"]
-        )
-        if has_match:
-            categories.add(category["name"])
-    
-    return list(categories)
+    return list(_categories_for(_interest_key(interests)))
+
+
+@lru_cache(maxsize=256)
+def _categories_for(interests: FrozenSet[str]) -> Tuple[str, ...]:
+    found = {name for interest in interests for name in _TAG_TO_CATEGORIES.get(interest, ())}
+    # Taxonomy order, independent of set iteration order
+    return tuple(name for name in _CATEGORY_NAMES if name in found)
 
 
 def validate_interests(interests: List[str]) -> Dict[str, List[str]]:
     """Validate if given interests are valid tags."""
-    all_tags = [t.lower() for t in get_all_tags()]
     valid = []
     invalid = []
     
     for interest in interests:
-        if interest.lower() in all_tags:
-            valid.append(interest)
-        else:
-            invalid.append(interest)
+        (valid if interest.casefold() in _ALL_TAGS_CF else invalid).append(interest)
     
     return {"valid": valid, "invalid": invalid}
 
 
 def get_search_terms_for_interests(interests: List[str]) -> List[str]:
-    """Get suggested search terms for given interests."""
-    search_terms: Set[str] = set()
-    categories = find_categories_for_interests(interests)
+    """Get suggested search terms for given interests.
     
-    # Add the interests themselves
-    for i in interests:
-        search_terms.add(i)
-    
-    # Add related category names as context
-    for cat in categories:
-        search_terms.add(cat)
-    
-    # Add specific event type keywords based on category
-    event_keywords = {
-        "Outdoor": ["outdoor events", "nature activities", "adventure tours"],
-        "Social Activities": ["social events", "networking events", "happy hours", "meetups"],
-        "Hobbies and Passion": ["hobby workshops", "craft classes", "creative events"],
-        "Sports and Fitness": ["fitness classes", "sports events", "workout sessions"],
-        "Health and Wellbeing": ["wellness events", "meditation sessions", "health workshops"],
-        "Technology": ["tech meetups", "hackathons", "startup events", "tech talks"],
-        "Art and Culture": ["art exhibitions", "cultural events", "museum exhibits", "performances"],
-        "Games": ["gaming events", "esports", "board game nights", "gaming tournaments"],
-        "Career and Business": ["business networking", "professional events", "industry conferences"],
-        "Science and Education": ["lectures", "educational workshops", "learning events"]
-    }
-    
-    for cat in categories:
-        if cat in event_keywords:
-            for term in event_keywords[cat]:
-                search_terms.add(term)
+    Deduplicated in a stable order: the interests, then each matched category
+    (taxonomy order) followed by its event keywords.
+    """
+    return list(dict.fromkeys(chain(interests, _category_search_terms(_interest_key(interests)))))
+
+
+def iter_search_terms_for_interests(interests: List[str]) -> Iterator[str]:
+    """Lazily yield the interests, then each matched category and its keywords.
     
-    return list(search_terms)
+    Not deduplicated; for callers that dedupe themselves or stop early.
+    """
+    yield from interests
+    for cat in find_categories_for_interests(interests):
+        yield from _CATEGORY_SEARCH_TERMS[cat]
+
+
+@lru_cache(maxsize=256)
+def _category_search_terms(interests: FrozenSet[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(chain.from_iterable(
+        _CATEGORY_SEARCH_TERMS[cat] for cat in _categories_for(interests)
+    )))
@@ -1,34 +1,48 @@
-from dotenv import load_dotenv
-load_dotenv()
+if __name__ == "__main__":
+    # Importers (api_server) load .env themselves; only the manual test needs
+    # it here, before nodes/scout/explorer read their config from the env
+    from dotenv import load_dotenv
+    load_dotenv()
+
+from functools import cache
 
 from langgraph.graph import StateGraph, START, END
 from state import ItineraryState
-from nodes import scout_node, explorer_node, planner_node
+from nodes import scout_explore_node, planner_node
 
-# Create the graph
-workflow = StateGraph(ItineraryState)
+@cache
+def build_graph():
+    """Build and compile the itinerary graph (once per process).
+    
+    The compiled graph has no checkpointer, so one instance is safely shared.
+    """
+    workflow = StateGraph(ItineraryState)
+    
+    # Add nodes
+    workflow.add_node("scout_explore", scout_explore_node)
+    workflow.add_node("planner", planner_node)
+    
+    # Add edges
+    workflow.add_edge(START, "scout_explore")
+    workflow.add_edge("scout_explore", "planner")
+    workflow.add_edge("planner", END)
+    
+    return workflow.compile()
 
-# Add nodes
-workflow.add_node("scout", scout_node)
-workflow.add_node("explorer", explorer_node)
-workflow.add_node("planner", planner_node)
 
-# Add edges
-workflow.add_edge(START, "scout")
-workflow.add_edge("scout", "explorer")
-workflow.add_edge("explorer", "planner")
-workflow.add_edge("planner", END)
+def __getattr__(name):
+    # Keeps `from workflow import app` working without compiling at import
+    if name == "app":
+        return build_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Compile graph
-app = workflow.compile()
 
 if __name__ == "__main__":
     import asyncio
-    from dotenv import load_dotenv
-    load_dotenv()
     
     async def main():
         print("Running manual test...")
+        app = build_graph()
         initial_state = {
             "city": "San Francisco",
             "interests": ["tech events", "AI hackathons"],